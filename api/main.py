@@ -4,14 +4,21 @@ Main FastAPI application for MBS AI Assistant MVP.
 This module provides the main API endpoints for the MBS AI Assistant.
 """
 
+import asyncio
+import hashlib
 import logging
+import re
 import time
 from contextlib import asynccontextmanager
-from typing import Dict, Any
+from typing import Any, Dict
 
-from fastapi import FastAPI, HTTPException, Request
+from anyio import to_thread
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse
+from pydantic import BaseModel
 import uvicorn
 
 import sys
@@ -19,7 +26,7 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config import settings
+from config import Settings, get_settings, settings
 from services.gemini_service import GeminiService
 from services.vector_service import VectorService
 from services.nlp_service import NLPService
@@ -31,34 +38,66 @@ from models import (
     AIStatusResponse,
 )
 from templates.enhanced_chat_ui import ENHANCED_CHAT_UI
-from src.mbs_clarity.db import fetch_item_aggregate
+from src.mbs_clarity.db import fetch_items_aggregate, get_conn
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Global service instances
-gemini_service: GeminiService = None
-vector_service: VectorService = None
-nlp_service: NLPService = None
+# Worker threads for blocking service and database calls (AnyIO default is 40)
+THREADPOOL_SIZE = 64
+
+# The UI page is constant: encode it and compute its validator once. The ETag is
+# weak because GZipMiddleware may re-encode the body.
+_INDEX_BODY = ENHANCED_CHAT_UI.encode("utf-8")
+INDEX_ETAG = f'W/"{hashlib.blake2b(_INDEX_BODY, digest_size=8).hexdigest()}"'
+_INDEX_HEADERS = {"Cache-Control": "public, max-age=300", "ETag": INDEX_ETAG}
+
+# /api/ai/status cache; the status only changes when services (re)initialize
+STATUS_CACHE_TTL_SECONDS = 5.0
+_status_cache: Dict[str, Any] = {"ts": 0.0, "value": None}
+_status_lock = asyncio.Lock()
+
+
+def _warm_up(state: Any) -> None:
+    """Warm the embedding model and the Gemini caches ahead of real traffic."""
+    state.vector.warm_up()
+    if settings.FREQUENT_QUERIES_PATH:
+        state.gemini.warm_caches(settings.FREQUENT_QUERIES_PATH)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Application lifespan manager."""
-    global gemini_service, vector_service, nlp_service
+    """Application lifespan manager.
+
+    Services are stored on ``app.state``; any that fail to start stay ``None``.
+    """
+    state = app.state
+    state.gemini = state.vector = state.nlp = None
+    # Background model and cache warm-up; startup does not wait on it
+    state.warmup_task = None
 
     logger.info("App startup: initializing services")
 
+    # Blocking NLP and SQLite calls run in the threadpool; size it for concurrent requests
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+    # Open the database once at boot so the WAL switch happens before any request
+    try:
+        with get_conn():
+            pass
+    except Exception as e:
+        logger.warning(f"Could not open MBS database at startup: {e}")
+
     try:
         # Initialize Gemini service
         logger.info("Initializing Gemini service...")
-        gemini_service = GeminiService()
+        state.gemini = GeminiService()
         logger.info("Gemini service initialized successfully")
 
         # Initialize Vector service
         logger.info("Initializing Vector service...")
-        vector_service = VectorService()
+        state.vector = VectorService()
         logger.info("Vector service initialized successfully")
 
         # Skip vector DB population during startup for faster deployment
@@ -69,15 +108,19 @@ async def lifespan(app: FastAPI):
 
         # Initialize NLP service
         logger.info("Initializing NLP service...")
-        nlp_service = NLPService()
+        state.nlp = NLPService()
         logger.info("NLP service initialized successfully")
 
+        # Load the local embedding model and prefill the Gemini caches with
+        # frequent queries in the background, without delaying the health check
+        state.warmup_task = asyncio.create_task(run_in_threadpool(_warm_up, state))
+
         logger.info("App startup: all services initialized successfully")
 
     except Exception as e:
         logger.error(f"App startup: failed to initialize services: {e}")
         logger.error(
-            f"Service status - Gemini: {gemini_service is not None}, Vector: {vector_service is not None}, NLP: {nlp_service is not None}"
+            f"Service status - Gemini: {state.gemini is not None}, Vector: {state.vector is not None}, NLP: {state.nlp is not None}"
         )
         # Continue startup even if services fail
 
@@ -91,9 +134,13 @@ app = FastAPI(
     title="MBS AI Assistant MVP",
     description="AI-powered MBS code lookup assistant using Gemini",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan,
 )
 
+# Compress larger responses (the UI page, multi-code /api/items payloads)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -104,23 +151,83 @@ app.add_middleware(
 )
 
 
+# Successful hits on these paths are polled frequently and not worth a log line
+_UNLOGGED_PATHS = frozenset({"/api/ai/status", "/health"})
+
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    """Log all requests."""
-    start = time.time()
+    """Log all requests except successful status polls."""
+    start = time.perf_counter()
     response = await call_next(request)
-    duration = (time.time() - start) * 1000
 
-    logger.info(
-        f"{request.method} {request.url.path} - {response.status_code} - {duration:.1f}ms"
-    )
+    path = request.url.path
+    if response.status_code == 200 and path in _UNLOGGED_PATHS:
+        return response
+
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "%s %s - %s - %.1fms",
+            request.method,
+            path,
+            response.status_code,
+            (time.perf_counter() - start) * 1000,
+        )
     return response
 
 
+def model_response(model: BaseModel) -> ORJSONResponse:
+    """Serialize an already-validated model without a response_model re-validation pass."""
+    return ORJSONResponse(model.model_dump())
+
+
+def uvicorn_options() -> Dict[str, Any]:
+    """Event loop and HTTP parser options for uvicorn.run.
+
+    Prefer uvloop and httptools (both installed by ``uvicorn[standard]``) and fall
+    back to asyncio/h11 where they are unavailable, e.g. on Windows dev boxes.
+    """
+    try:
+        import uvloop  # noqa: F401
+
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+
+    try:
+        import httptools  # noqa: F401
+
+        http = "httptools"
+    except ImportError:
+        http = "h11"
+
+    return {"loop": loop, "http": http, "interface": "asgi3"}
+
+
+def uvicorn_workers() -> int:
+    """Number of uvicorn worker processes: WEB_CONCURRENCY, else 1.
+
+    Each worker builds its own services (and loads its own embedding model), so
+    more workers are opt-in on hosts with the memory for them.
+    """
+    return int(os.environ.get("WEB_CONCURRENCY", 1))
+
+
 @app.get("/", response_class=HTMLResponse)
-async def index():
+async def index(request: Request):
     """Serve the dual-panel MBS AI Assistant UI."""
-    return HTMLResponse(ENHANCED_CHAT_UI)
+    if_none_match = request.headers.get("if-none-match", "")
+    if INDEX_ETAG in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=_INDEX_HEADERS)
+    return HTMLResponse(_INDEX_BODY, headers=_INDEX_HEADERS)
+
+
+def get_nlp_service(request: Request) -> NLPService:
+    """Resolve the NLP service from app state, or fail with 503 if it isn't up."""
+    nlp_service = getattr(request.app.state, "nlp", None)
+    if nlp_service is None:
+        raise HTTPException(status_code=503, detail="NLP service not available")
+    return nlp_service
 
 
 @app.get("/health")
@@ -129,48 +236,68 @@ async def health_check():
     return {"status": "healthy", "message": "MBS AI Assistant is running"}
 
 
-@app.get("/api/ai/status", response_model=AIStatusResponse)
-async def get_ai_status():
-    """Get AI service status and capabilities."""
-    try:
-        global gemini_service, vector_service, nlp_service
+@app.get("/api/ai/status", responses={200: {"model": AIStatusResponse}})
+async def get_ai_status(
+    request: Request, app_settings: Settings = Depends(get_settings)
+):
+    """Get AI service status and capabilities.
+
+    The UI polls this endpoint, so the result is cached for a few seconds.
+    """
+    async with _status_lock:
+        age = time.monotonic() - _status_cache["ts"]
+        if _status_cache["value"] is None or age >= STATUS_CACHE_TTL_SECONDS:
+            _status_cache["value"] = await run_in_threadpool(
+                _build_ai_status, request.app.state, app_settings
+            )
+            _status_cache["ts"] = time.monotonic()
+        status = _status_cache["value"]
+
+    return model_response(status)
 
+
+def _build_ai_status(state, app_settings: Settings) -> AIStatusResponse:
+    """Check (and lazily initialize) the AI services and collect their status.
+
+    Runs under ``_status_lock``, so on-demand initialization never races.
+    """
+    try:
         # Try to initialize services if they failed during startup
-        if not gemini_service:
+        if not state.gemini:
             try:
                 logger.info("Attempting to initialize Gemini service on-demand...")
-                gemini_service = GeminiService()
+                state.gemini = GeminiService()
                 logger.info("Gemini service initialized successfully on-demand")
             except Exception as e:
                 logger.error(f"Failed to initialize Gemini service on-demand: {e}")
 
-        if not vector_service:
+        if not state.vector:
             try:
                 logger.info("Attempting to initialize Vector service on-demand...")
-                vector_service = VectorService()
+                state.vector = VectorService()
                 logger.info("Vector service initialized successfully on-demand")
             except Exception as e:
                 logger.error(f"Failed to initialize Vector service on-demand: {e}")
 
-        if not nlp_service and gemini_service and vector_service:
+        if not state.nlp and state.gemini and state.vector:
             try:
                 logger.info("Attempting to initialize NLP service on-demand...")
-                nlp_service = NLPService()
+                state.nlp = NLPService()
                 logger.info("NLP service initialized successfully on-demand")
             except Exception as e:
                 logger.error(f"Failed to initialize NLP service on-demand: {e}")
 
         # Check service availability
-        ai_enabled = all([gemini_service, vector_service, nlp_service])
-        gemini_available = gemini_service is not None
-        vector_db_initialized = vector_service is not None
-        nlp_service_initialized = nlp_service is not None
+        ai_enabled = all([state.gemini, state.vector, state.nlp])
+        gemini_available = state.gemini is not None
+        vector_db_initialized = state.vector is not None
+        nlp_service_initialized = state.nlp is not None
 
         # Get vector DB stats if available
         vector_db_stats = None
-        if vector_service:
+        if state.vector:
             try:
-                vector_db_stats = vector_service.get_collection_stats()
+                vector_db_stats = state.vector.get_collection_stats()
             except Exception as e:
                 logger.warning(f"Could not get vector DB stats: {e}")
                 vector_db_stats = {"error": str(e)}
@@ -180,8 +307,8 @@ async def get_ai_status():
             gemini_available=gemini_available,
             vector_db_initialized=vector_db_initialized,
             nlp_service_initialized=nlp_service_initialized,
-            model_name=settings.GEMINI_MODEL_NAME,
-            embedding_model=settings.GEMINI_EMBEDDING_MODEL,
+            model_name=app_settings.GEMINI_MODEL_NAME,
+            embedding_model=app_settings.GEMINI_EMBEDDING_MODEL,
             vector_db_stats=vector_db_stats,
         )
 
@@ -198,27 +325,27 @@ async def get_ai_status():
         )
 
 
-@app.post("/api/ai/natural-language", response_model=NaturalLanguageResponse)
-async def natural_language_query(request: NaturalLanguageQuery):
+@app.post(
+    "/api/ai/natural-language", responses={200: {"model": NaturalLanguageResponse}}
+)
+async def natural_language_query(
+    request: NaturalLanguageQuery, nlp_service: NLPService = Depends(get_nlp_service)
+):
     """Process natural language queries from doctors."""
     try:
-        global nlp_service
-
-        if not nlp_service:
-            raise HTTPException(status_code=503, detail="NLP service not available")
-
         logger.info(f"Natural language query: '{request.query}'")
 
-        # Process the query
-        result = nlp_service.process_natural_language_query(
-            query=request.query, context=request.context
+        # Analysis and vector search run concurrently, off the event loop
+        result = await nlp_service.process_natural_language_query_async(
+            query=request.query,
+            context=request.context,
         )
 
         logger.info(
             f"Query processed, found {len(result.get('suggested_codes', []))} suggestions"
         )
 
-        return NaturalLanguageResponse(**result)
+        return model_response(NaturalLanguageResponse(**result))
 
     except HTTPException:
         raise
@@ -227,14 +354,12 @@ async def natural_language_query(request: NaturalLanguageQuery):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/ai/conversation", response_model=NaturalLanguageResponse)
-async def conversational_query(request: Dict[str, Any]):
+@app.post("/api/ai/conversation", responses={200: {"model": NaturalLanguageResponse}})
+async def conversational_query(
+    request: Dict[str, Any], nlp_service: NLPService = Depends(get_nlp_service)
+):
     """Process conversational queries with context awareness."""
     try:
-        global nlp_service
-        if not nlp_service:
-            raise HTTPException(status_code=503, detail="NLP service not available")
-
         query = request.get("query", "")
         conversation_history = request.get("conversation_history", [])
         context = request.get("context", {})
@@ -246,15 +371,17 @@ async def conversational_query(request: Dict[str, Any]):
             f"Conversational query: '{query}' with {len(conversation_history)} previous messages"
         )
 
-        result = nlp_service.process_conversational_query(
-            query=query, conversation_history=conversation_history, context=context
+        result = await nlp_service.process_conversational_query_async(
+            query=query,
+            conversation_history=conversation_history,
+            context=context,
         )
 
         logger.info(
             f"Conversational query processed, found {len(result.get('suggested_codes', []))} suggestions"
         )
 
-        return NaturalLanguageResponse(**result)
+        return model_response(NaturalLanguageResponse(**result))
 
     except HTTPException:
         raise
@@ -263,6 +390,43 @@ async def conversational_query(request: Dict[str, Any]):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# MBS item numbers are all-digit; anything else in the codes list is a separator
+_CODE_RE = re.compile(r"[0-9]+")
+
+
+def _item_payload(item_row, rel_rows, con_rows) -> Dict[str, Any]:
+    """Convert an item aggregate into its API structure."""
+    return {
+        "item": {
+            "item_num": item_row[0],
+            "category": item_row[1],
+            "group_code": item_row[2],
+            "schedule_fee": item_row[3],
+            "description": item_row[4],
+            "derived_fee": item_row[5],
+            "start_date": item_row[6],
+            "end_date": item_row[7],
+            "provider_type": item_row[8],
+            "emsn_description": item_row[9],
+        },
+        "relations": [
+            {
+                "relation_type": rel[0],
+                "target_item_num": rel[1],
+                "detail": rel[2],
+            }
+            for rel in rel_rows
+        ],
+        "constraints": [
+            {
+                "constraint_type": con[0],
+                "value": con[1],
+            }
+            for con in con_rows
+        ],
+    }
+
+
 @app.get("/api/items")
 async def get_items(codes: str):
     """Get MBS item information for specific codes."""
@@ -270,63 +434,22 @@ async def get_items(codes: str):
         if not codes:
             raise HTTPException(status_code=400, detail="No codes provided")
 
-        # Parse comma-separated codes
-        code_list = [code.strip() for code in codes.split(",") if code.strip()]
+        # Parse comma-separated codes in one regex pass, dropping duplicates
+        code_list = list(dict.fromkeys(_CODE_RE.findall(codes)))
 
         if not code_list:
             raise HTTPException(status_code=400, detail="No valid codes provided")
 
-        items = []
+        # Fetch all requested items in one batch (three queries in total)
+        aggregates = await run_in_threadpool(fetch_items_aggregate, code_list)
+        found = [code for code in code_list if aggregates.get(code)]
 
-        for code in code_list:
-            try:
-                # Fetch item data using the existing function
-                item_data = fetch_item_aggregate(code)
-
-                if item_data and item_data[0]:  # item_row exists
-                    item_row, rel_rows, con_rows = item_data
-
-                    # Convert to structured format
-                    item = {
-                        "item": {
-                            "item_num": item_row[0],
-                            "category": item_row[1],
-                            "group_code": item_row[2],
-                            "schedule_fee": item_row[3],
-                            "description": item_row[4],
-                            "derived_fee": item_row[5],
-                            "start_date": item_row[6],
-                            "end_date": item_row[7],
-                            "provider_type": item_row[8],
-                            "emsn_description": item_row[9],
-                        },
-                        "relations": [
-                            {
-                                "relation_type": rel[0],
-                                "target_item_num": rel[1],
-                                "detail": rel[2],
-                            }
-                            for rel in rel_rows
-                        ],
-                        "constraints": [
-                            {
-                                "constraint_type": con[0],
-                                "value": con[1],
-                            }
-                            for con in con_rows
-                        ],
-                    }
-
-                    items.append(item)
-
-            except Exception as e:
-                logger.warning(f"Failed to fetch item {code}: {e}")
-                continue
-
-        if not items:
+        if not found:
             raise HTTPException(status_code=404, detail="No items found")
 
-        return {"items": items}
+        return ORJSONResponse(
+            {"items": [_item_payload(*aggregates[code]) for code in found]}
+        )
 
     except HTTPException:
         raise
@@ -346,4 +469,12 @@ if __name__ == "__main__":
     logger.info(f"PORT environment variable: {os.environ.get('PORT')}")
     logger.info(f"DEBUG mode: {settings.DEBUG}")
 
-    uvicorn.run(app, host=host, port=port, log_level="info")
+    # Multiple workers need the app as an import string
+    uvicorn.run(
+        "api.main:app",
+        host=host,
+        port=port,
+        log_level="info",
+        workers=uvicorn_workers(),
+        **uvicorn_options(),
+    )
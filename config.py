@@ -3,14 +3,22 @@ Configuration settings for MBS AI Assistant MVP using Gemini.
 """
 
 import os
+from functools import lru_cache
 from typing import Optional
-from pydantic import BaseModel, Field, field_validator
-from pydantic_settings import BaseSettings
+from pydantic import BaseModel, Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     """Application settings for MBS AI Assistant."""
 
+    # Field names match env vars exactly
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=True,
+    )
+
     # Gemini Configuration
     GEMINI_API_KEY: str = Field(..., description="Google Gemini API key")
     GEMINI_MODEL_NAME: str = Field("gemini-2.5-flash", description="Gemini model name")
@@ -27,6 +35,18 @@ class Settings(BaseSettings):
         "sentence-transformers/all-MiniLM-L6-v2", description="Local embedding model"
     )
 
+    # Embedding cache; an empty path keeps the cache in memory only
+    EMBEDDING_CACHE_PATH: str = Field(
+        "~/.cache/mbs_search/embeddings.sqlite",
+        description="SQLite file for cached Gemini and local-model embeddings",
+    )
+
+    # Queries whose embeddings and analyses are cached at startup; empty disables
+    FREQUENT_QUERIES_PATH: str = Field(
+        "data/frequent_queries.jsonl",
+        description="JSONL file of frequent queries used to warm the Gemini caches",
+    )
+
     # ChromaDB Configuration
     CHROMA_PERSIST_DIRECTORY: str = Field(
         "./chroma_db", description="ChromaDB persistence directory"
@@ -40,25 +60,21 @@ class Settings(BaseSettings):
 
     # API Configuration
     API_HOST: str = Field("127.0.0.1", description="API host")
-    API_PORT: int = Field(8000, description="API port")
+    # Render provides the port in $PORT; API_PORT still overrides it when set
+    API_PORT: int = Field(
+        default_factory=lambda: int(os.environ.get("PORT", 8000)),
+        description="API port",
+    )
 
     # Database Configuration
     MBS_DB_PATH: str = Field("mbs.db", description="Path to MBS SQLite database")
 
-    @field_validator("API_PORT", mode="before")
-    @classmethod
-    def validate_api_port(cls, v):
-        """Handle PORT environment variable from Render."""
-        if isinstance(v, str) and v.startswith("$"):
-            # Handle environment variable references like $PORT
-            port_value = os.getenv(v[1:], "8000")
-            return int(port_value)
-        return int(v)
 
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load settings once; later calls reuse the parsed instance."""
+    return Settings()
 
 
 # Global settings instance
-settings = Settings()
+settings = get_settings()
@@ -0,0 +1,14 @@
+"""
+Put the project root on sys.path for scripts run as ``python scripts/<name>.py``.
+
+Scripts import this module first; Python caches it, so the root is resolved and
+added once per process however many scripts are loaded.
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
@@ -0,0 +1,25 @@
+"""
+Shared service instances for the debug scripts.
+
+Creating the services loads ChromaDB (and the local embedding model when
+enabled), so each one is built once per process and reused by every debug
+step that runs in it.
+"""
+
+import functools
+
+DEFAULT_QUERY = "general practitioner consultation"
+
+
+@functools.cache
+def get_nlp_service():
+    """Return the process-wide NLP service, creating it on first use."""
+    from services.nlp_service import NLPService
+
+    return NLPService()
+
+
+@functools.cache
+def get_vector_service():
+    """Return the vector service owned by the shared NLP service."""
+    return get_nlp_service().vector_service
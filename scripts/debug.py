@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Run one or more debug steps against a single set of services.
+
+Examples:
+    python scripts/debug.py search structure pipeline
+    python scripts/debug.py pipeline --query "skin lesion excision"
+    python scripts/debug.py repl
+"""
+
+import argparse
+import sys
+
+import _bootstrap  # noqa: F401  (adds the project root to sys.path)
+
+from scripts._harness import DEFAULT_QUERY, get_nlp_service
+
+
+def run_enable_local(query: str) -> bool:
+    """Enable local embeddings in .env, then test the system."""
+    from scripts.enable_local_embeddings import enable_local_embeddings, test_system
+
+    enable_local_embeddings()
+    return test_system(query)
+
+
+def run_pipeline(query: str) -> bool:
+    """Step through the NLP pipeline."""
+    from scripts.debug_nlp_pipeline import debug_nlp_pipeline
+
+    return debug_nlp_pipeline(query)
+
+
+def run_structure(query: str) -> bool:
+    """Print the structure of a search result."""
+    from scripts.debug_search_structure import debug_search_results
+
+    return debug_search_results(query)
+
+
+def run_search(query: str) -> bool:
+    """Run a vector search and print collection stats."""
+    from scripts.debug_vector_search import test_vector_search
+
+    return test_vector_search(query)
+
+
+def run_repl(query: str) -> bool:
+    """Answer queries interactively with the services kept warm."""
+    nlp_service = get_nlp_service()
+    print("Enter a query (blank line or Ctrl-D to exit)")
+
+    while True:
+        try:
+            line = input("query> ").strip()
+        except EOFError:
+            break
+        if not line:
+            break
+
+        result = nlp_service.process_natural_language_query(line)
+        print(f"  Suggested codes: {', '.join(result.get('suggested_codes', []))}")
+        print(f"  Processing time: {result.get('processing_time_ms', 0):.1f}ms")
+
+    return True
+
+
+# List enable-local before other steps: it edits .env, which is read once per process
+STEPS = {
+    "enable-local": run_enable_local,
+    "search": run_search,
+    "structure": run_structure,
+    "pipeline": run_pipeline,
+    "repl": run_repl,
+}
+
+
+def main(argv=None):
+    """Main function."""
+    parser = argparse.ArgumentParser(description="MBS AI Assistant debug harness")
+    parser.add_argument("steps", nargs="+", choices=list(STEPS), help="steps to run")
+    parser.add_argument("--query", default=DEFAULT_QUERY, help="query to test with")
+    args = parser.parse_args(argv)
+
+    print("🔍 MBS AI Assistant - Debug Harness")
+    print("=" * 50)
+
+    failed = []
+    for step in args.steps:
+        print(f"\n▶️  {step}")
+        if not STEPS[step](args.query):
+            failed.append(step)
+
+    if failed:
+        print(f"\n⚠️  Failed steps: {', '.join(failed)}")
+        return 1
+
+    print("\n🎉 Debug completed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
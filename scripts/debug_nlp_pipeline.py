@@ -3,27 +3,20 @@
 Debug script to test the entire NLP pipeline.
 """
 
-import os
-import sys
 import json
 
-# Add project root to path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import _bootstrap  # noqa: F401  (adds the project root to sys.path)
 
+from scripts._harness import DEFAULT_QUERY, get_nlp_service
 
-def debug_nlp_pipeline():
+
+def debug_nlp_pipeline(query: str = DEFAULT_QUERY):
     """Debug the entire NLP pipeline."""
     try:
-        from config import settings
-        from services.nlp_service import NLPService
-
         print("🔄 Debugging NLP pipeline...")
 
-        # Initialize NLP service
-        nlp_service = NLPService()
+        nlp_service = get_nlp_service()
 
-        # Test query
-        query = "general practitioner consultation"
         print(f"🔍 Testing query: '{query}'")
 
         # Step 1: Test analysis
@@ -38,7 +31,7 @@ def debug_nlp_pipeline():
 
         if search_results:
             print("First result metadata:")
-            print(json.dumps(search_results[0]["metadata"], indent=2))
+            print(json.dumps(search_results.metadatas[0], indent=2))
 
         # Step 3: Test code suggestions
         print("\n💡 Step 3: Testing code suggestions...")
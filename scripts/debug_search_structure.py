@@ -3,27 +3,21 @@
 Debug script to examine vector search results structure.
 """
 
-import os
-import sys
 import json
 
-# Add project root to path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import _bootstrap  # noqa: F401  (adds the project root to sys.path)
 
+from scripts._harness import DEFAULT_QUERY, get_vector_service
 
-def debug_search_results():
+
+def debug_search_results(query: str = DEFAULT_QUERY):
     """Debug the structure of search results."""
     try:
-        from config import settings
-        from services.vector_service import VectorService
-
         print("🔄 Debugging search results structure...")
 
-        # Initialize vector service
-        vector_service = VectorService()
+        vector_service = get_vector_service()
 
         # Test a simple search
-        query = "general practitioner consultation"
         print(f"🔍 Testing query: '{query}'")
 
         results = vector_service.search(query, max_results=3)
@@ -3,26 +3,20 @@
 Debug script to test vector search functionality.
 """
 
-import os
-import sys
 
-# Add project root to path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import _bootstrap  # noqa: F401  (adds the project root to sys.path)
 
+from scripts._harness import DEFAULT_QUERY, get_vector_service
 
-def test_vector_search():
+
+def test_vector_search(query: str = DEFAULT_QUERY):
     """Test vector search functionality."""
     try:
-        from config import settings
-        from services.vector_service import VectorService
-
         print("🔄 Testing vector search...")
 
-        # Initialize vector service
-        vector_service = VectorService()
+        vector_service = get_vector_service()
 
         # Test a simple search
-        query = "general practitioner consultation"
         print(f"🔍 Testing query: '{query}'")
 
         results = vector_service.search(query, max_results=5)
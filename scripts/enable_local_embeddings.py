@@ -6,10 +6,10 @@ This script helps resolve Gemini API quota issues by switching to local embeddin
 """
 
 import os
-import sys
 
-# Add project root to path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import _bootstrap  # noqa: F401  (adds the project root to sys.path)
+
+from scripts._harness import DEFAULT_QUERY, get_nlp_service
 
 
 def enable_local_embeddings():
@@ -36,21 +36,14 @@ def enable_local_embeddings():
         print("ℹ️  Local embeddings already configured")
 
 
-def test_system():
+def test_system(query: str = DEFAULT_QUERY):
     """Test the system with local embeddings."""
     try:
-        from config import settings
-        from services.vector_service import VectorService
-        from services.nlp_service import NLPService
-
         print("🔄 Testing system with local embeddings...")
 
-        # Initialize services
-        vector_service = VectorService()
-        nlp_service = NLPService()
+        nlp_service = get_nlp_service()
 
         # Test a simple query
-        query = "general practitioner consultation"
         print(f"🔍 Testing query: '{query}'")
 
         result = nlp_service.process_natural_language_query(query)
@@ -7,13 +7,10 @@ the vector database with embeddings generated by Gemini.
 """
 
 import logging
-import sys
-import os
 import sqlite3
 from typing import List, Dict, Any
 
-# Add project root to path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import _bootstrap  # noqa: F401  (adds the project root to sys.path)
 
 from config import settings
 from services.vector_service import VectorService
@@ -5,11 +5,8 @@ Script to reset and repopulate the vector database with local embeddings.
 This resolves the embedding dimension mismatch issue.
 """
 
-import os
-import sys
 
-# Add project root to path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import _bootstrap  # noqa: F401  (adds the project root to sys.path)
 
 
 def reset_vector_database():
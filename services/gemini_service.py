@@ -5,20 +5,465 @@ This module handles Google Gemini API interactions for text generation,
 embeddings, and structured responses.
 """
 
+import hashlib
+import json
 import logging
-from typing import Any, Dict, List, Optional, AsyncGenerator
-import google.generativeai as genai
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
-
-import sys
-import os
-
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    AsyncGenerator,
+    Tuple,
+    TypedDict,
+)
+import numpy as np
+import orjson
 
 from config import settings
 
+if TYPE_CHECKING:
+    import google.generativeai as genai
+
 logger = logging.getLogger(__name__)
 
+# Dimension of the zero vectors used when an embedding can't be generated
+EMBEDDING_DIM = 768
+# Texts per embed_content request (the API's batch limit)
+EMBEDDING_BATCH_SIZE = 100
+# Attempts per embedding request when the quota is exhausted, and the first backoff
+EMBEDDING_MAX_ATTEMPTS = 5
+EMBEDDING_RETRY_BASE_DELAY = 1.0
+
+
+def _zero_embeddings(count: int) -> np.ndarray:
+    """Fallback embeddings for texts that couldn't be embedded."""
+    return np.zeros((count, EMBEDDING_DIM), dtype=np.float32)
+
+
+def _nonzero(vector: np.ndarray) -> Optional[np.ndarray]:
+    """The vector itself, or None for a zero (fallback) vector."""
+    return vector if vector.any() else None
+
+
+def _is_quota_error(error: Exception) -> bool:
+    """Check whether an API error means the Gemini quota is exhausted."""
+    return "quota" in str(error).lower() or "429" in str(error)
+
+
+def _retry_delay(attempt: int) -> float:
+    """Exponential backoff with jitter before retry number ``attempt + 1``."""
+    return EMBEDDING_RETRY_BASE_DELAY * 2**attempt + random.random()
+
+
+def _embed_content(**kwargs: Any) -> Any:
+    """genai.embed_content, retried with backoff while the quota is exhausted."""
+    for attempt in range(EMBEDDING_MAX_ATTEMPTS):
+        try:
+            return _genai().embed_content(**kwargs)
+        except Exception as e:
+            if not _is_quota_error(e) or attempt == EMBEDDING_MAX_ATTEMPTS - 1:
+                raise
+            delay = _retry_delay(attempt)
+            logger.warning(f"Gemini quota exceeded, retrying embedding in {delay:.1f}s")
+            time.sleep(delay)
+
+
+class EmbeddingCache:
+    """Embedding cache keyed by a hash of model name and text.
+
+    Entries live in an in-memory LRU and, when ``path`` is set, in a SQLite file
+    so they survive restarts. Vectors are float32 arrays, stored on disk as
+    their raw bytes.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        if path:
+            try:
+                db_path = Path(path).expanduser()
+                db_path.parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS emb "
+                    "(key TEXT PRIMARY KEY, model TEXT, vec BLOB)"
+                )
+                self._conn.commit()
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Embedding cache on disk disabled ({path}): {e}")
+                self._conn = None
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        """Cache key for a text; the model is included so switching models misses."""
+        return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Return the cached vectors for whichever of ``keys`` are present."""
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+
+            missing = [key for key in keys if key not in found]
+            rows = []
+            if self._conn is not None and missing:
+                placeholders = ",".join(["?"] * len(missing))
+                try:
+                    rows = self._conn.execute(
+                        f"SELECT key, vec FROM emb WHERE key IN ({placeholders})",
+                        missing,
+                    ).fetchall()
+                except sqlite3.Error as e:
+                    self._disable_disk(e)
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+                self._remember(key, found[key])
+
+        return found
+
+    def put_many(
+        self, model: str, vectors: Dict[str, Any], persist: bool = True
+    ) -> None:
+        """Store vectors by cache key; with ``persist`` false, in memory only."""
+        if not vectors:
+            return
+        vectors = {
+            key: np.asarray(vector, dtype=np.float32) for key, vector in vectors.items()
+        }
+        with self._lock:
+            for key, vector in vectors.items():
+                self._remember(key, vector)
+            if self._conn is not None and persist:
+                try:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO emb (key, model, vec) VALUES (?, ?, ?)",
+                        [
+                            (key, model, vector.tobytes())
+                            for key, vector in vectors.items()
+                        ],
+                    )
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    self._disable_disk(e)
+
+    def _disable_disk(self, error: sqlite3.Error) -> None:
+        """Keep caching in memory only after the SQLite file fails."""
+        logger.warning(f"Embedding cache on disk disabled: {error}")
+        self._conn.close()
+        self._conn = None
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+class ResponseCache:
+    """Cache of successful structured Gemini responses.
+
+    Responses are scoped by system prompt and temperature. Within a scope a prompt
+    hits either exactly or, for callers that opt in, semantically: when its
+    embedding has cosine similarity of at least ``threshold`` with a cached prompt.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 512):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._exact: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # scope -> (unit-length prompt embeddings, one row per response; responses)
+        self._semantic: Dict[str, Tuple[np.ndarray, List[Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def scope(system_prompt: Optional[str], temperature: float) -> str:
+        """Cache scope for a system prompt and temperature."""
+        return hashlib.sha256(
+            f"{temperature}\0{system_prompt or ''}".encode()
+        ).hexdigest()
+
+    def get(self, scope: str, prompt: str) -> Optional[Dict[str, Any]]:
+        """Return the response cached for exactly this prompt, if any."""
+        key = self._key(scope, prompt)
+        with self._lock:
+            response = self._exact.get(key)
+            if response is not None:
+                self._exact.move_to_end(key)
+            return response
+
+    def get_similar(
+        self, scope: str, embedding: np.ndarray
+    ) -> Optional[Dict[str, Any]]:
+        """Return the response for the most similar cached prompt above threshold."""
+        with self._lock:
+            matrix, responses = self._semantic.get(scope, (None, []))
+            if matrix is None:
+                return None
+            similarities = matrix @ embedding
+            best = int(np.argmax(similarities))
+            return responses[best] if similarities[best] >= self.threshold else None
+
+    def indexed(self, scope: str) -> bool:
+        """Whether any prompt embeddings are indexed in this scope."""
+        with self._lock:
+            return scope in self._semantic
+
+    def put(
+        self,
+        scope: str,
+        prompt: str,
+        response: Dict[str, Any],
+        embedding: Optional[np.ndarray] = None,
+    ) -> None:
+        """Cache a response, and index its prompt embedding when one is given."""
+        with self._lock:
+            key = self._key(scope, prompt)
+            self._exact[key] = response
+            self._exact.move_to_end(key)
+            if len(self._exact) > self.max_entries:
+                self._exact.popitem(last=False)
+
+            if embedding is not None:
+                self._index(scope, embedding, response)
+
+    def index(
+        self, scope: str, embedding: np.ndarray, response: Dict[str, Any]
+    ) -> None:
+        """Index a prompt embedding for a response that is already cached."""
+        with self._lock:
+            self._index(scope, embedding, response)
+
+    def _index(
+        self, scope: str, embedding: np.ndarray, response: Dict[str, Any]
+    ) -> None:
+        matrix, responses = self._semantic.get(scope, (None, []))
+        row = embedding[np.newaxis, :]
+        matrix = row if matrix is None else np.vstack([matrix, row])
+        responses = responses + [response]
+        self._semantic[scope] = (
+            matrix[-self.max_entries :],
+            responses[-self.max_entries :],
+        )
+
+    @staticmethod
+    def _key(scope: str, prompt: str) -> str:
+        return hashlib.sha256(f"{scope}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+# Structured responses run at a low temperature, where output is stable enough
+# to cache and reuse
+STRUCTURED_TEMPERATURE = 0.3
+
+# Output token ceilings; decode time grows with output length
+STRUCTURED_MAX_TOKENS = 1024
+ANALYSIS_MAX_TOKENS = 256  # one six-field JSON object
+FOLLOW_UP_MAX_TOKENS = 300  # up to five short questions
+
+_response_cache = ResponseCache()
+
+# Embeds prompts for the semantic index after their response is returned
+_INDEX_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="response-index")
+
+class AnalysisResult(NamedTuple):
+    """A query analysis and how it was produced.
+
+    ``source`` is "keywords" (the keyword tables covered the query), "gemini", or
+    "fallback" (Gemini failed and the keyword analysis stands in for it).
+    """
+
+    analysis: Dict[str, Any]
+    source: str
+
+
+# Yielded by generate_response_stream in place of text when generation fails
+STREAM_ERROR_MESSAGE = "Error: the AI response could not be generated."
+
+
+class QueryAnalysis(TypedDict):
+    """JSON schema Gemini fills in for analyze_medical_query."""
+
+    body_part: Optional[str]
+    procedure_type: Optional[str]
+    provider_type: Optional[str]
+    location: Optional[str]
+    specific_details: Optional[str]
+    patient_characteristics: Optional[str]
+
+
+def _keyword_re(keywords) -> "re.Pattern[str]":
+    """One alternation matching any keyword at the start of a word."""
+    return re.compile(r"\b(" + "|".join(map(re.escape, keywords)) + ")")
+
+
+# Keyword tables for the offline (no-Gemini) analysis: matched text -> value
+_PROVIDER_TYPES = {
+    "general practitioner": "general practitioner",
+    "gp": "general practitioner",
+    "specialist": "specialist",
+    "consultant": "consultant",
+}
+_PROCEDURE_TYPES = {
+    "consultation": "consultation",
+    "examination": "examination",
+    "surgery": "surgery",
+    "imaging": "imaging",
+    "scan": "imaging",
+}
+_LOCATIONS = {
+    "consulting rooms": "consulting rooms",
+    "hospital": "hospital",
+    "home": "home",
+}
+_BODY_PARTS = (
+    "chest",
+    "heart",
+    "lung",
+    "abdomen",
+    "head",
+    "neck",
+    "back",
+    "leg",
+    "arm",
+)
+# Every keyword -> (analysis field, value), scanned in one pass; longer
+# keywords come first so they win over any keyword they start with
+_ANALYSIS_KEYWORDS = {
+    keyword: (field, value)
+    for field, table in (
+        ("provider_type", _PROVIDER_TYPES),
+        ("procedure_type", _PROCEDURE_TYPES),
+        ("location", _LOCATIONS),
+        ("body_part", {part: part for part in _BODY_PARTS}),
+    )
+    for keyword, value in table.items()
+}
+_ANALYSIS_RE = _keyword_re(sorted(_ANALYSIS_KEYWORDS, key=len, reverse=True))
+# Fields the keyword tables can fill; a query filling all of them skips Gemini
+_KEYWORD_FIELDS = ("body_part", "procedure_type", "provider_type", "location")
+
+# Offline follow-up questions, keyed by the query term that triggers them
+_BASIC_FOLLOW_UP_QUESTIONS = {
+    "consultation": (
+        "Was this a standard consultation (Level A), long consultation (Level B), or very long consultation (Level C)?",
+        "What was the primary reason for the consultation?",
+        "Did the consultation involve any significant mental health component?",
+    ),
+    "examination": (
+        "What type of examination was performed?",
+        "Was this a comprehensive examination or focused examination?",
+        "Did the examination involve any specific body systems?",
+    ),
+    "surgery": (
+        "What type of surgical procedure was performed?",
+        "Was this performed under general or local anesthesia?",
+        "What was the complexity level of the surgery?",
+    ),
+}
+_GENERIC_FOLLOW_UP_QUESTIONS = (
+    "What was the primary reason for the procedure?",
+    "Were there any specific requirements or constraints?",
+    "What was the duration or complexity of the procedure?",
+)
+_FOLLOW_UP_TOPIC_RE = _keyword_re(_BASIC_FOLLOW_UP_QUESTIONS)
+
+
+@lru_cache(maxsize=16)
+def _system_prefix(system_prompt: str) -> str:
+    """System prompt plus separator, built once per distinct system prompt."""
+    return f"{system_prompt}\n\n"
+
+
+def _json_object(content: str) -> Optional[Dict[str, Any]]:
+    """Parse a JSON object; None (logged) for invalid JSON or any other value."""
+    try:
+        parsed = orjson.loads(content)
+    except orjson.JSONDecodeError as e:
+        logger.warning(f"Failed to parse JSON response: {e}")
+        return None
+    if not isinstance(parsed, dict):
+        logger.warning("JSON response is not an object")
+        return None
+    return parsed
+
+
+@lru_cache(maxsize=1)
+def _genai() -> Any:
+    """Import and configure the Gemini SDK on first use.
+
+    The import is slow, so processes that never call Gemini don't pay for it.
+    Configuring once also matters: every genai.configure call drops the SDK's
+    cached clients, and their gRPC channels with them. This way every
+    GeminiService shares one HTTP/2 channel per client, kept alive and
+    multiplexed across concurrent calls (streaming gets its own grpc_asyncio
+    channel the same way).
+    """
+    import google.generativeai as genai
+
+    genai.configure(api_key=settings.GEMINI_API_KEY, transport="grpc")
+    return genai
+
+
+@lru_cache(maxsize=1)
+def _safety_settings() -> Dict[Any, Any]:
+    """Safety settings shared by every generation call."""
+    from google.generativeai.types import HarmBlockThreshold, HarmCategory
+
+    return {
+        HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+    }
+
+
+@lru_cache(maxsize=1)
+def _stream_config() -> "genai.types.GenerationConfig":
+    return _genai().types.GenerationConfig(temperature=0.7, max_output_tokens=2048)
+
+
+@lru_cache(maxsize=8)
+def _structured_config(
+    response_schema: Optional[Any] = None,
+    max_tokens: int = STRUCTURED_MAX_TOKENS,
+) -> "genai.types.GenerationConfig":
+    """Generation config for structured calls, one per schema and token budget."""
+    json_mode = (
+        {
+            "response_mime_type": "application/json",
+            "response_schema": response_schema,
+        }
+        if response_schema is not None
+        else {}
+    )
+    return _genai().types.GenerationConfig(
+        temperature=STRUCTURED_TEMPERATURE, max_output_tokens=max_tokens, **json_mode
+    )
+
+
+@lru_cache(maxsize=1)
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide embedding cache shared by every GeminiService."""
+    return EmbeddingCache(settings.EMBEDDING_CACHE_PATH or None)
+
 
 class GeminiService:
     """Service for Google Gemini API interactions."""
@@ -29,115 +474,249 @@ class GeminiService:
         self.model_name = settings.GEMINI_MODEL_NAME
         self.embedding_model = settings.GEMINI_EMBEDDING_MODEL
 
-        # Configure Gemini
-        genai.configure(api_key=self.api_key)
-
-        # Initialize models
-        self.model = genai.GenerativeModel(self.model_name)
-        self.embedding_model_instance = genai.GenerativeModel(self.embedding_model)
+        # How analyze_medical_query was answered: "keywords" or "gemini"
+        self.analysis_counts: Counter = Counter()
 
+        # The SDK is imported and configured on the first Gemini call
         logger.info(f"Gemini service initialized with model: {self.model_name}")
 
-    def generate_response_stream(
+    @cached_property
+    def model(self) -> "genai.GenerativeModel":
+        """Generation model, created on first use; embeddings call the SDK directly."""
+        return _genai().GenerativeModel(self.model_name)
+
+    @staticmethod
+    def _full_prompt(prompt: str, system_prompt: Optional[str]) -> str:
+        return _system_prefix(system_prompt) + prompt if system_prompt else prompt
+
+    async def generate_response_stream(
         self, prompt: str, system_prompt: Optional[str] = None
     ) -> AsyncGenerator[str, None]:
-        """Generate streaming response from Gemini."""
+        """Generate streaming response from Gemini, yielding text as it arrives."""
         try:
-            full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
-
-            response = self.model.generate_content(
-                full_prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=2048,
-                ),
-                safety_settings={
-                    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-                    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                },
+            response = await self.model.generate_content_async(
+                self._full_prompt(prompt, system_prompt),
+                generation_config=_stream_config(),
+                safety_settings=_safety_settings(),
+                stream=True,
             )
 
-            # For now, return the full response (streaming can be added later)
-            if response.text:
-                yield response.text
+            # Read each chunk's own parts; response.text would resolve the whole stream
+            async for chunk in response:
+                if chunk.parts and chunk.text:
+                    yield chunk.text
 
         except Exception as e:
+            # The exception stays in the logs; callers get a fixed message
             logger.error(f"Error generating Gemini response: {e}")
-            yield f"Error: {str(e)}"
+            yield STREAM_ERROR_MESSAGE
 
     def generate_structured_response(
-        self, prompt: str, system_prompt: Optional[str] = None
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        semantic_cache: bool = False,
+        response_schema: Optional[Any] = None,
+        max_tokens: int = STRUCTURED_MAX_TOKENS,
     ) -> Dict[str, Any]:
-        """Generate structured response from Gemini."""
-        try:
-            full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
+        """Generate structured response from Gemini.
+
+        Successful responses are cached. With ``semantic_cache`` a prompt that is
+        a near-duplicate of a cached one (by embedding) reuses its response too.
+        The prompt is only embedded up front when there are indexed prompts to
+        match; otherwise it is indexed in the background once answered.
+        With ``response_schema`` Gemini answers in JSON mode, constrained to it.
+        ``max_tokens`` caps the output length.
+        """
+        scope = self._response_scope(system_prompt)
+        cached = self._cached_response(scope, prompt)
+        embedding = None
+        if cached is None and semantic_cache and _response_cache.indexed(scope):
+            embedding = _nonzero(self.get_embeddings([prompt])[0])
+            cached = self._cached_response(scope, prompt, embedding)
+        if cached is not None:
+            return cached
 
+        try:
             response = self.model.generate_content(
-                full_prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.3,
-                    max_output_tokens=1024,
-                ),
-                safety_settings={
-                    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-                    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                },
+                self._full_prompt(prompt, system_prompt),
+                generation_config=_structured_config(response_schema, max_tokens),
+                safety_settings=_safety_settings(),
+            )
+            result = self._structured_result(
+                response, scope, prompt, embedding, json_mode=response_schema is not None
             )
 
-            return {
-                "success": True,
-                "content": response.text if response.text else "",
-                "model": self.model_name,
-            }
+        except Exception as e:
+            return self._structured_error(e)
+
+        if semantic_cache and embedding is None and result["success"]:
+            _INDEX_POOL.submit(self._index_prompt, scope, prompt, dict(result))
+        return result
 
+    def _index_prompt(self, scope: str, prompt: str, result: Dict[str, Any]) -> None:
+        """Embed an answered prompt into the semantic index; runs off the request."""
+        try:
+            embedding = _nonzero(self.get_embeddings([prompt])[0])
         except Exception as e:
-            logger.error(f"Error generating structured Gemini response: {e}")
-            return {
-                "success": False,
-                "error": str(e),
-                "content": "",
-                "model": self.model_name,
-            }
-
-    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Get embeddings for a list of texts using Gemini."""
+            logger.warning(f"Could not index prompt for the response cache: {e}")
+            return
+        if embedding is not None:
+            _response_cache.index(scope, embedding, result)
+
+    @staticmethod
+    def _response_scope(system_prompt: Optional[str]) -> str:
+        """Response cache scope for structured output with this system prompt."""
+        return _response_cache.scope(system_prompt, STRUCTURED_TEMPERATURE)
+
+    @staticmethod
+    def _cached_response(
+        scope: str, prompt: str, embedding: Optional[np.ndarray] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Look up a cached response exactly, or semantically when given an embedding."""
+        if embedding is None:
+            cached = _response_cache.get(scope, prompt)
+        else:
+            cached = _response_cache.get_similar(scope, embedding)
+        if cached is None:
+            return None
+        logger.info("Using cached Gemini response")
+        return dict(cached)
+
+    def _structured_result(
+        self,
+        response: Any,
+        scope: str,
+        prompt: str,
+        embedding: Optional[np.ndarray],
+        json_mode: bool = False,
+    ) -> Dict[str, Any]:
+        """Result dict for a Gemini reply, cached only when it is complete.
+
+        Replies cut short (token limit, safety) or empty count as failures, and
+        JSON-mode replies must parse before they are cached, so a bad reply is
+        never replayed to later callers.
+        """
+        content = self._response_text(response)
+        if not content:
+            # Blocked, truncated or empty; callers fall back as for any failed request
+            return self._structured_error(
+                ValueError("Gemini returned no complete content")
+            )
+        if json_mode and _json_object(content) is None:
+            return self._structured_error(ValueError("Gemini returned invalid JSON"))
+        result = {"success": True, "content": content, "model": self.model_name}
+        _response_cache.put(scope, prompt, dict(result), embedding)
+        return result
+
+    @staticmethod
+    def _response_text(response: Any) -> str:
+        """Text of the first candidate, or "" unless it finished normally.
+
+        Reads the parts directly; response.text re-validates the candidate and
+        raises for blocked responses. A candidate that stopped for any reason
+        other than STOP (MAX_TOKENS, SAFETY, ...) may carry partial parts.
+        """
+        candidate = response.candidates[0] if response.candidates else None
+        if candidate is None or candidate.finish_reason.name != "STOP":
+            return ""
+        return "".join(part.text for part in candidate.content.parts)
+
+    def _structured_error(self, error: Exception) -> Dict[str, Any]:
+        logger.error(f"Error generating structured Gemini response: {error}")
+        return {
+            "success": False,
+            "error": str(error),
+            "content": "",
+            "model": self.model_name,
+        }
+
+    def get_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Get embeddings for a list of texts, calling Gemini only for uncached ones.
+
+        Returns a ``(len(texts), EMBEDDING_DIM)`` float32 array, one row per text.
+        Rows are unit-length (zero for texts that couldn't be embedded), so
+        cosine similarity against them is a plain dot product.
+        """
+        keys, vectors, missing = self._cached_embeddings(texts)
+        if missing:
+            fetched = self._fetch_embeddings(list(missing.values()))
+            self._store_embeddings(vectors, missing, fetched)
+        return self._embedding_matrix(keys, vectors)
+
+    @staticmethod
+    def _embedding_matrix(
+        keys: List[str], vectors: Dict[str, np.ndarray]
+    ) -> np.ndarray:
+        matrix = np.empty((len(keys), EMBEDDING_DIM), dtype=np.float32)
+        for row, key in enumerate(keys):
+            matrix[row] = vectors[key]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.maximum(norms, 1e-12)
+        return matrix
+
+    def _cached_embeddings(
+        self, texts: List[str]
+    ) -> Tuple[List[str], Dict[str, np.ndarray], Dict[str, str]]:
+        """Split texts into cache keys, cached vectors and unique uncached texts."""
+        cache = get_embedding_cache()
+        keys = [cache.key(self.embedding_model, text) for text in texts]
+        vectors = cache.get_many(keys)
+
+        # Unique uncached texts, in first-seen order
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+
+        logger.info(
+            f"Embeddings: {len(texts) - len(missing)} cached, {len(missing)} requested"
+        )
+        return keys, vectors, missing
+
+    def _store_embeddings(
+        self,
+        vectors: Dict[str, np.ndarray],
+        missing: Dict[str, str],
+        fetched: List[Any],
+    ) -> None:
+        fetched_by_key = {
+            key: np.asarray(vector, dtype=np.float32)
+            for key, vector in zip(missing, fetched)
+        }
+        # Zero vectors are fallbacks for failed requests; don't cache those
+        get_embedding_cache().put_many(
+            self.embedding_model,
+            {key: vector for key, vector in fetched_by_key.items() if vector.any()},
+        )
+        vectors.update(fetched_by_key)
+
+    def _fetch_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Get embeddings for a list of texts using Gemini.
+
+        Texts are sent in batches of EMBEDDING_BATCH_SIZE; a batch that fails is
+        retried one text at a time so a single bad text doesn't zero the batch.
+        """
         try:
             embeddings = []
 
-            for i, text in enumerate(texts):
+            for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+                batch = texts[start : start + EMBEDDING_BATCH_SIZE]
                 try:
-                    # Use Gemini's embedding model
-                    result = genai.embed_content(
+                    result = _embed_content(
                         model=self.embedding_model,
-                        content=text,
+                        content=batch,
                         task_type="retrieval_document",
                     )
-
-                    if result and "embedding" in result:
-                        embeddings.append(result["embedding"])
-                    else:
-                        logger.warning(
-                            f"No embedding generated for text: {text[:50]}..."
-                        )
-                        embeddings.append([0.0] * 768)  # Fallback embedding
-
+                    if self._take_batch(result, batch, start, embeddings):
+                        continue
                 except Exception as e:
-                    if "quota" in str(e).lower() or "429" in str(e):
-                        logger.warning(
-                            f"Gemini quota exceeded for embedding {i+1}/{len(texts)}"
-                        )
-                        # Use fallback embeddings for remaining texts
-                        embeddings.extend([[0.0] * 768 for _ in range(len(texts) - i)])
+                    if self._batch_failed(e, start, len(batch), len(texts), embeddings):
                         break
-                    else:
-                        logger.warning(
-                            f"Error generating embedding for text {i+1}: {e}"
-                        )
-                        embeddings.append([0.0] * 768)  # Fallback embedding
+
+                if not self._embed_individually(batch, start, len(texts), embeddings):
+                    # Quota exceeded: the remaining texts were filled with fallbacks
+                    break
 
             logger.info(f"Generated {len(embeddings)} embeddings using Gemini")
             return embeddings
@@ -145,133 +724,205 @@ class GeminiService:
         except Exception as e:
             logger.error(f"Error generating embeddings: {e}")
             # Return zero embeddings as fallback
-            return [[0.0] * 768 for _ in texts]
+            return _zero_embeddings(len(texts))
+
+    @staticmethod
+    def _take_batch(
+        result: Any, batch: List[str], start: int, embeddings: List[List[float]]
+    ) -> bool:
+        """Append a batch response's vectors; False if it didn't cover the batch."""
+        batch_embeddings = result.get("embedding") if result else None
+        if batch_embeddings and len(batch_embeddings) == len(batch):
+            embeddings.extend(batch_embeddings)
+            return True
+        logger.warning(
+            f"Incomplete embedding batch for texts {start+1}-{start+len(batch)}, retrying individually"
+        )
+        return False
+
+    @staticmethod
+    def _batch_failed(
+        error: Exception,
+        start: int,
+        size: int,
+        total: int,
+        embeddings: List[List[float]],
+    ) -> bool:
+        """Handle a failed batch request; True if the quota ran out.
+
+        When the quota stays exhausted through every retry, the remaining texts
+        are filled with fallbacks.
+        """
+        if _is_quota_error(error):
+            logger.error(
+                f"Gemini quota still exceeded after {EMBEDDING_MAX_ATTEMPTS} attempts, "
+                f"zero-filling embeddings {start+1}-{total}"
+            )
+            # Use fallback embeddings for remaining texts; they aren't cached
+            embeddings.extend(_zero_embeddings(total - start))
+            return True
+        logger.warning(
+            f"Error embedding texts {start+1}-{start+size}, retrying individually: {error}"
+        )
+        return False
+
+    def _embed_individually(
+        self,
+        batch: List[str],
+        offset: int,
+        total: int,
+        embeddings: List[List[float]],
+    ) -> bool:
+        """Embed a failed batch one text at a time, appending to ``embeddings``.
+
+        Returns False if the quota ran out, after filling fallback embeddings for
+        every remaining text (``total`` counts all texts, ``offset`` this batch's start).
+        """
+        for i, text in enumerate(batch, start=offset):
+            try:
+                result = _embed_content(
+                    model=self.embedding_model,
+                    content=text,
+                    task_type="retrieval_document",
+                )
+
+                if result and "embedding" in result:
+                    embeddings.append(result["embedding"])
+                else:
+                    logger.warning(f"No embedding generated for text: {text[:50]}...")
+                    embeddings.extend(_zero_embeddings(1))
+
+            except Exception as e:
+                if _is_quota_error(e):
+                    logger.error(
+                        f"Gemini quota still exceeded after {EMBEDDING_MAX_ATTEMPTS} "
+                        f"attempts, zero-filling embeddings {i+1}-{total}"
+                    )
+                    embeddings.extend(_zero_embeddings(total - i))
+                    return False
+                logger.warning(f"Error generating embedding for text {i+1}: {e}")
+                embeddings.extend(_zero_embeddings(1))
+
+        return True
+
+    ANALYSIS_SYSTEM_PROMPT = (
+        "Medical coding assistant. From the procedure description, extract for MBS "
+        "code matching: body_part, procedure_type (consultation, surgery, imaging...), "
+        "provider_type (GP, specialist...), location (consulting rooms, hospital...), "
+        "specific_details (side, duration, complexity), patient_characteristics "
+        "(age, condition). Use null when not mentioned."
+    )
 
     def analyze_medical_query(self, query: str) -> Dict[str, Any]:
-        """Analyze a medical query to extract key information."""
-        system_prompt = """
-        You are a medical coding assistant. Analyze the following medical procedure description
-        and extract key information for MBS code matching.
-        
-        Extract:
-        1. Body part/organ mentioned
-        2. Procedure type (consultation, surgery, imaging, etc.)
-        3. Specific details (left/right, duration, complexity)
-        4. Patient characteristics (age, condition)
-        5. Provider type (GP, specialist, etc.)
-        6. Location (consulting rooms, hospital, etc.)
-        
-        Return ONLY a JSON object with these fields. No other text.
+        """Analyze a medical query to extract key information.
+
+        Queries the keyword tables fully cover are answered without Gemini.
         """
+        return self.analyze_medical_query_result(query).analysis
 
+    def analyze_medical_query_result(self, query: str) -> AnalysisResult:
+        """Like :meth:`analyze_medical_query`, also saying how it was answered."""
+        basic = self._confident_basic_analysis(query)
+        if basic is not None:
+            return AnalysisResult(basic, "keywords")
         try:
-            response = self.generate_structured_response(query, system_prompt)
-
-            if response["success"]:
-                # Try to parse JSON response
-                import json
-
-                try:
-                    # Clean the response content
-                    content = response["content"].strip()
-
-                    # Remove any markdown formatting
-                    if content.startswith("```json"):
-                        content = content[7:]
-                    if content.endswith("```"):
-                        content = content[:-3]
-                    content = content.strip()
-
-                    analysis = json.loads(content)
-
-                    # Validate required fields
-                    required_fields = [
-                        "body_part",
-                        "procedure_type",
-                        "provider_type",
-                        "location",
-                    ]
-                    for field in required_fields:
-                        if field not in analysis:
-                            analysis[field] = None
-
-                    return analysis
-
-                except json.JSONDecodeError as e:
-                    logger.warning(f"Failed to parse JSON response: {e}")
-                    logger.warning(f"Raw response: {response['content']}")
-
-                    # Fallback to basic analysis
-                    return self._basic_query_analysis(query)
-            else:
-                logger.warning(
-                    f"Gemini analysis failed: {response.get('error', 'Unknown error')}"
-                )
-                return self._basic_query_analysis(query)
+            # Near-duplicate queries reuse an earlier analysis
+            response = self.generate_structured_response(
+                query,
+                self.ANALYSIS_SYSTEM_PROMPT,
+                semantic_cache=True,
+                response_schema=QueryAnalysis,
+                max_tokens=ANALYSIS_MAX_TOKENS,
+            )
+            analysis = self._parse_analysis(response)
+            if analysis is not None:
+                return AnalysisResult(analysis, "gemini")
 
         except Exception as e:
             logger.error(f"Error analyzing medical query: {e}")
-            return self._basic_query_analysis(query)
+
+        return AnalysisResult(self._basic_query_analysis(query), "fallback")
+
+    def _confident_basic_analysis(self, query: str) -> Optional[Dict[str, Any]]:
+        """Keyword analysis, if it fills every field the keyword tables cover."""
+        analysis = self._basic_query_analysis(query)
+        if all(analysis[field] for field in _KEYWORD_FIELDS):
+            self.analysis_counts["keywords"] += 1
+            return analysis
+        self.analysis_counts["gemini"] += 1
+        return None
+
+    def warm_caches(self, path: str) -> int:
+        """Pre-embed frequent queries and seed the analysis cache with their answers.
+
+        ``path`` is a JSONL file with one ``{"query": ..., "analysis": {...}}``
+        object per line; ``analysis`` is optional. Returns the number of queries
+        warmed. Embeddings go through the persistent embedding cache, so only
+        new queries cost an API call.
+        """
+        try:
+            with open(path, encoding="utf-8") as f:
+                entries = [orjson.loads(line) for line in f if line.strip()]
+        except (OSError, orjson.JSONDecodeError) as e:
+            logger.warning(f"Cache warm-up skipped ({path}): {e}")
+            return 0
+        entries = [entry for entry in entries if entry.get("query")]
+        if not entries:
+            return 0
+
+        embeddings = self.get_embeddings([entry["query"] for entry in entries])
+        scope = self._response_scope(self.ANALYSIS_SYSTEM_PROMPT)
+        for entry, embedding in zip(entries, embeddings):
+            analysis = entry.get("analysis")
+            if not analysis:
+                continue
+            fields = QueryAnalysis.__annotations__
+            content = json.dumps({field: analysis.get(field) for field in fields})
+            _response_cache.put(
+                scope,
+                entry["query"],
+                {"success": True, "content": content, "model": self.model_name},
+                _nonzero(embedding),
+            )
+
+        logger.info(f"Warmed Gemini caches with {len(entries)} frequent queries")
+        return len(entries)
+
+    def _parse_analysis(self, response: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Parse the JSON analysis; None if the request failed or isn't JSON."""
+        if not response["success"]:
+            logger.warning(
+                f"Gemini analysis failed: {response.get('error', 'Unknown error')}"
+            )
+            return None
+
+        analysis = _json_object(response["content"])
+        if analysis is None:
+            logger.warning(f"Raw response: {response['content']}")
+            return None
+
+        # Nullable fields may be left out of the JSON
+        return {field: analysis.get(field) for field in QueryAnalysis.__annotations__}
 
     def _basic_query_analysis(self, query: str) -> Dict[str, Any]:
         """Basic query analysis when AI is not available."""
-        query_lower = query.lower()
-
-        # Simple keyword-based analysis
-        analysis = {
-            "body_part": None,
-            "procedure_type": None,
-            "provider_type": None,
-            "location": None,
-            "specific_details": None,
-            "patient_characteristics": None,
-        }
+        analysis: Dict[str, Any] = dict.fromkeys(QueryAnalysis.__annotations__)
 
-        # Extract provider type
-        if "general practitioner" in query_lower or "gp" in query_lower:
-            analysis["provider_type"] = "general practitioner"
-        elif "specialist" in query_lower:
-            analysis["provider_type"] = "specialist"
-        elif "consultant" in query_lower:
-            analysis["provider_type"] = "consultant"
-
-        # Extract procedure type
-        if "consultation" in query_lower:
-            analysis["procedure_type"] = "consultation"
-        elif "examination" in query_lower:
-            analysis["procedure_type"] = "examination"
-        elif "surgery" in query_lower:
-            analysis["procedure_type"] = "surgery"
-        elif "imaging" in query_lower or "scan" in query_lower:
-            analysis["procedure_type"] = "imaging"
-
-        # Extract location
-        if "consulting rooms" in query_lower:
-            analysis["location"] = "consulting rooms"
-        elif "hospital" in query_lower:
-            analysis["location"] = "hospital"
-        elif "home" in query_lower:
-            analysis["location"] = "home"
-
-        # Extract body parts
-        body_parts = [
-            "chest",
-            "heart",
-            "lung",
-            "abdomen",
-            "head",
-            "neck",
-            "back",
-            "leg",
-            "arm",
-        ]
-        for part in body_parts:
-            if part in query_lower:
-                analysis["body_part"] = part
-                break
+        # Simple keyword-based analysis in one scan; the first keyword per field wins
+        for keyword in _ANALYSIS_RE.findall(query.lower()):
+            field, value = _ANALYSIS_KEYWORDS[keyword]
+            if analysis[field] is None:
+                analysis[field] = value
 
         return analysis
 
+    FOLLOW_UP_SYSTEM_PROMPT = (
+        "Medical coding assistant. Write 3-5 concise follow-up questions that "
+        "narrow the doctor's query to one of the suggested MBS codes, asking for "
+        "details that differ between them or are missing. One question per line, "
+        "nothing else."
+    )
+
     def generate_follow_up_questions(
         self,
         query: str,
@@ -280,84 +931,59 @@ class GeminiService:
     ) -> List[str]:
         """Generate follow-up questions to narrow down code selection."""
         try:
-            system_prompt = """
-            You are a medical coding assistant. Given a doctor's query and suggested MBS codes,
-            generate 3-5 concise follow-up questions to help narrow down the most appropriate code.
-            Focus on details that differentiate the suggested codes or are missing from the initial query.
-            Return only the questions, one per line.
-            """
+            response = self.generate_structured_response(
+                self._follow_up_prompt(query, suggested_codes, context),
+                self.FOLLOW_UP_SYSTEM_PROMPT,
+                max_tokens=FOLLOW_UP_MAX_TOKENS,
+            )
+            return self._parse_follow_up_questions(query, suggested_codes, response)
 
-            context_info = f"Context: {context}" if context else ""
-            prompt = f"""
+        except Exception as e:
+            logger.error(f"Error generating follow-up questions: {e}")
+            return self._generate_basic_follow_up_questions(query, suggested_codes)
+
+    @staticmethod
+    def _follow_up_prompt(
+        query: str, suggested_codes: List[str], context: Optional[Dict[str, Any]]
+    ) -> str:
+        context_info = f"Context: {context}" if context else ""
+        return f"""
             Doctor's query: {query}
             Suggested MBS codes: {', '.join(suggested_codes)}
             {context_info}
             Generate follow-up questions:
             """
 
-            response = self.generate_structured_response(prompt, system_prompt)
-
-            if response["success"]:
-                # Split response into individual questions
-                questions = [
-                    q.strip() for q in response["content"].split("\n") if q.strip()
-                ]
-                logger.info(f"Generated {len(questions)} follow-up questions")
-                return questions
-            else:
-                logger.warning(
-                    f"Failed to generate follow-up questions: {response.get('error', 'Unknown error')}"
-                )
-                return self._generate_basic_follow_up_questions(query, suggested_codes)
-
-        except Exception as e:
-            logger.error(f"Error generating follow-up questions: {e}")
+    def _parse_follow_up_questions(
+        self, query: str, suggested_codes: List[str], response: Dict[str, Any]
+    ) -> List[str]:
+        if not response["success"]:
+            logger.warning(
+                f"Failed to generate follow-up questions: {response.get('error', 'Unknown error')}"
+            )
             return self._generate_basic_follow_up_questions(query, suggested_codes)
 
+        # Split response into individual questions
+        questions = [q.strip() for q in response["content"].split("\n") if q.strip()]
+        logger.info(f"Generated {len(questions)} follow-up questions")
+        return questions
+
     def _generate_basic_follow_up_questions(
         self, query: str, suggested_codes: List[str]
     ) -> List[str]:
         """Generate basic follow-up questions when AI is not available."""
-        questions = []
-
-        query_lower = query.lower()
+        topics = set(_FOLLOW_UP_TOPIC_RE.findall(query.lower()))
 
         # Basic questions based on common MBS code differentiators
-        if "consultation" in query_lower:
-            questions.extend(
-                [
-                    "Was this a standard consultation (Level A), long consultation (Level B), or very long consultation (Level C)?",
-                    "What was the primary reason for the consultation?",
-                    "Did the consultation involve any significant mental health component?",
-                ]
-            )
-
-        if "examination" in query_lower:
-            questions.extend(
-                [
-                    "What type of examination was performed?",
-                    "Was this a comprehensive examination or focused examination?",
-                    "Did the examination involve any specific body systems?",
-                ]
-            )
-
-        if "surgery" in query_lower:
-            questions.extend(
-                [
-                    "What type of surgical procedure was performed?",
-                    "Was this performed under general or local anesthesia?",
-                    "What was the complexity level of the surgery?",
-                ]
-            )
+        questions = [
+            question
+            for topic, topic_questions in _BASIC_FOLLOW_UP_QUESTIONS.items()
+            if topic in topics
+            for question in topic_questions
+        ]
 
         # Generic questions if no specific type detected
         if not questions:
-            questions.extend(
-                [
-                    "What was the primary reason for the procedure?",
-                    "Were there any specific requirements or constraints?",
-                    "What was the duration or complexity of the procedure?",
-                ]
-            )
+            questions.extend(_GENERIC_FOLLOW_UP_QUESTIONS)
 
         return questions[:5]  # Limit to 5 questions
@@ -3,156 +3,534 @@ Natural Language Processing service for MBS AI Assistant MVP.
 
 This module handles natural language queries from doctors and converts them
 into relevant MBS code suggestions using Gemini and vector search.
+
+Query results are built from plain dicts, lists, strings and numbers only, so
+the API layer serializes them with orjson and no ``default`` hook.
 """
 
+import asyncio
 import logging
+import re
+import threading
 import time
-from typing import Any, Dict, List, Optional
-
-import sys
-import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from anyio import to_thread
 
-from services.gemini_service import GeminiService
-from services.vector_service import VectorService
+from services.gemini_service import FOLLOW_UP_MAX_TOKENS, GeminiService
+from services.vector_service import SearchResults, VectorService
 from config import settings
-from src.mbs_clarity.db import fetch_item_aggregate
+from src.mbs_clarity.db import fetch_items_aggregate
 
 logger = logging.getLogger(__name__)
 
+# Medical terms that earn a confidence bonus when shared by query and description
+CONFIDENCE_MEDICAL_TERMS = frozenset(
+    (
+        "consultation",
+        "examination",
+        "assessment",
+        "treatment",
+        "procedure",
+        "general practitioner",
+        "gp",
+        "specialist",
+        "surgeon",
+        "physician",
+        "chest",
+        "heart",
+        "lung",
+        "abdomen",
+        "head",
+        "neck",
+        "back",
+        "leg",
+        "arm",
+        "pain",
+        "injury",
+        "condition",
+        "disease",
+        "disorder",
+        "syndrome",
+        "diagnosis",
+        "therapy",
+        "surgery",
+        "operation",
+        "intervention",
+    )
+)
+
+
+# Medical/MBS related keywords; a query containing any of them is on topic
+MEDICAL_KEYWORDS = (
+    "consultation",
+    "examination",
+    "assessment",
+    "treatment",
+    "procedure",
+    "general practitioner",
+    "gp",
+    "specialist",
+    "surgeon",
+    "physician",
+    "chest",
+    "heart",
+    "lung",
+    "abdomen",
+    "head",
+    "neck",
+    "back",
+    "leg",
+    "arm",
+    "pain",
+    "injury",
+    "condition",
+    "disease",
+    "disorder",
+    "syndrome",
+    "diagnosis",
+    "therapy",
+    "surgery",
+    "operation",
+    "intervention",
+    "chronic",
+    "acute",
+    "emergency",
+    "urgent",
+    "routine",
+    "follow-up",
+    "mental health",
+    "psychiatric",
+    "psychological",
+    "counseling",
+    "imaging",
+    "scan",
+    "x-ray",
+    "ultrasound",
+    "mri",
+    "ct",
+    "pet",
+    "blood test",
+    "laboratory",
+    "pathology",
+    "biopsy",
+    "culture",
+    "vaccination",
+    "immunization",
+    "injection",
+    "medication",
+    "prescription",
+    "patient",
+    "medical",
+    "health",
+    "clinical",
+    "hospital",
+    "clinic",
+    "mbs",
+    "item",
+    "code",
+    "billing",
+    "medicare",
+    "fee",
+    "schedule",
+)
+
+# Non-medical topics to reject
+NON_MEDICAL_TOPICS = (
+    "weather",
+    "sports",
+    "cooking",
+    "travel",
+    "shopping",
+    "entertainment",
+    "politics",
+    "finance",
+    "technology",
+    "programming",
+    "coding",
+    "education",
+    "school",
+    "university",
+    "job",
+    "career",
+    "business",
+    "relationship",
+    "dating",
+    "family",
+    "personal",
+    "hobby",
+    "game",
+)
+
+
+def _substring_re(words) -> "re.Pattern[str]":
+    """One case-insensitive alternation matching any of ``words`` anywhere."""
+    return re.compile("|".join(map(re.escape, words)), re.IGNORECASE)
+
+
+_MEDICAL_KEYWORDS_RE = _substring_re(MEDICAL_KEYWORDS)
+_NON_MEDICAL_TOPICS_RE = _substring_re(NON_MEDICAL_TOPICS)
+
+# Medical terms quoted in the reasoning when shared by query and description:
+# the clinical keywords, without the billing and setting words
+REASONING_MEDICAL_TERMS = frozenset(MEDICAL_KEYWORDS) - {
+    "patient",
+    "medical",
+    "health",
+    "clinical",
+    "hospital",
+    "clinic",
+    "mbs",
+    "item",
+    "code",
+    "billing",
+    "medicare",
+    "fee",
+    "schedule",
+}
+
+
+def _word_start_re(terms) -> "re.Pattern[str]":
+    """One alternation matching terms at a word start in lowercased text.
+
+    Only the start is anchored, so plurals and other suffixed forms still match
+    ("injections" finds "injection") while "ct" no longer matches inside "fact".
+    """
+    alternation = "|".join(map(re.escape, sorted(terms, key=len, reverse=True)))
+    return re.compile(r"\b(" + alternation + ")")
+
+
+_CONFIDENCE_TERMS_RE = _word_start_re(CONFIDENCE_MEDICAL_TERMS)
+_REASONING_TERMS_RE = _word_start_re(REASONING_MEDICAL_TERMS)
+
+# Common words never quoted as a reason for a match
+REASONING_STOPWORDS = frozenset(
+    (
+        "the",
+        "and",
+        "for",
+        "with",
+        "this",
+        "that",
+        "from",
+        "they",
+        "have",
+        "been",
+        "were",
+        "said",
+        "each",
+        "which",
+        "their",
+        "time",
+        "will",
+        "about",
+        "there",
+        "could",
+        "other",
+        "after",
+        "first",
+        "well",
+        "also",
+        "where",
+        "much",
+        "some",
+        "very",
+        "when",
+        "here",
+        "just",
+        "into",
+        "over",
+        "think",
+        "back",
+        "then",
+        "them",
+        "these",
+        "so",
+        "its",
+        "now",
+        "find",
+        "any",
+        "new",
+        "work",
+        "part",
+        "take",
+        "get",
+        "place",
+        "made",
+        "live",
+        "little",
+        "only",
+        "round",
+        "man",
+        "year",
+        "came",
+        "show",
+        "every",
+        "good",
+        "me",
+        "give",
+        "our",
+        "under",
+        "name",
+        "through",
+        "form",
+        "sentence",
+        "great",
+        "say",
+        "help",
+        "low",
+        "line",
+        "differ",
+        "turn",
+        "cause",
+        "mean",
+        "before",
+        "move",
+        "right",
+        "boy",
+        "old",
+        "too",
+        "same",
+        "she",
+        "all",
+        "up",
+        "use",
+        "word",
+        "how",
+        "an",
+        "do",
+        "if",
+        "out",
+        "many",
+        "can",
+        "what",
+        "no",
+        "way",
+        "people",
+        "my",
+        "than",
+        "water",
+        "call",
+        "who",
+        "oil",
+        "sit",
+        "long",
+        "down",
+        "day",
+        "did",
+        "come",
+        "may",
+    )
+)
+
+
+# Fallback reasoning when no terms are quoted: a topic shared by query and
+# description, else a kind of service named in the description; first wins
+REASONING_SHARED_TOPICS = (
+    ("consultation", "Matched based on consultation-related content"),
+    ("examination", "Matched based on examination-related content"),
+    ("surgery", "Matched based on surgical procedure content"),
+    ("general practitioner", "Matched based on general practitioner services"),
+)
+REASONING_DESCRIPTION_TOPICS = (
+    ("professional attendance", "Matched based on professional attendance services"),
+    ("procedure", "Matched based on medical procedure content"),
+    ("treatment", "Matched based on treatment-related services"),
+)
+
+# Every fallback topic found in one scan; the lookahead reports overlapping
+# occurrences, so each topic is found exactly when ``topic in text`` holds
+_REASONING_TOPICS_RE = re.compile(
+    "(?=("
+    + "|".join(
+        re.escape(topic)
+        for topic, _ in REASONING_SHARED_TOPICS + REASONING_DESCRIPTION_TOPICS
+    )
+    + "))"
+)
+
+
+class QueryTerms(NamedTuple):
+    """Query-side inputs to confidence scoring, reasoning and fallback questions."""
+
+    lower: str
+    # Words over three letters
+    words: FrozenSet[str]
+    medical_terms: FrozenSet[str]
+    # In order of appearance, for the reasoning text
+    reasoning_terms: Tuple[str, ...]
+    # Words over three letters that are not stopwords, in order of appearance
+    reasoning_words: Tuple[str, ...]
+    topics: FrozenSet[str]
+
+
+@lru_cache(maxsize=256)
+def _query_terms(query: str) -> QueryTerms:
+    """Lowercase and scan a query once, however many helpers need it."""
+    query_lower = query.lower()
+    long_words = tuple(
+        dict.fromkeys(word for word in query_lower.split() if len(word) > 3)
+    )
+    return QueryTerms(
+        query_lower,
+        frozenset(long_words),
+        frozenset(_CONFIDENCE_TERMS_RE.findall(query_lower)),
+        tuple(dict.fromkeys(_REASONING_TERMS_RE.findall(query_lower))),
+        tuple(word for word in long_words if word not in REASONING_STOPWORDS),
+        frozenset(_REASONING_TOPICS_RE.findall(query_lower)),
+    )
+
+
+class DescriptionTerms(NamedTuple):
+    """Description-side inputs to confidence scoring and reasoning."""
+
+    words: FrozenSet[str]
+    # Every reasoning medical term present; the confidence terms are a subset
+    medical_terms: FrozenSet[str]
+    topics: FrozenSet[str]
+
+
+@lru_cache(maxsize=8192)
+def _description_terms(description: str) -> DescriptionTerms:
+    """Scan an item description once; descriptions recur across requests."""
+    description_lower = description.lower()
+    return DescriptionTerms(
+        frozenset(description_lower.split()),
+        frozenset(_REASONING_TERMS_RE.findall(description_lower)),
+        frozenset(_REASONING_TOPICS_RE.findall(description_lower)),
+    )
+
+
+def _fallback_reasoning(
+    query_topics: FrozenSet[str], description_topics: FrozenSet[str]
+) -> str:
+    """Reasoning for a suggestion that shares no quotable terms with the query."""
+    for topic, reasoning in REASONING_SHARED_TOPICS:
+        if topic in query_topics and topic in description_topics:
+            return reasoning
+    for topic, reasoning in REASONING_DESCRIPTION_TOPICS:
+        if topic in description_topics:
+            return reasoning
+    return "Matched based on medical service content"
+
+
+class ConversationMessage(NamedTuple):
+    """The fields of a conversation message that query processing reads."""
+
+    type: Optional[str]
+    content: str
+    suggested_codes: List[str]
+
+
+# Runs a request's main vector search while its provider search runs on the
+# request thread; shared so requests don't each start a thread
+_SEARCH_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="vector-search")
+
+# Messages of the conversation history that feed a conversational query
+CONVERSATION_WINDOW = 5
+
+
+def recent_messages(
+    conversation_history: List[Dict[str, Any]],
+) -> List[ConversationMessage]:
+    """Convert the last CONVERSATION_WINDOW history dicts into messages, once."""
+    return [
+        ConversationMessage(
+            message.get("type"),
+            message.get("content", ""),
+            message.get("suggested_codes") or [],
+        )
+        for message in conversation_history[-CONVERSATION_WINDOW:]
+    ]
+
+
+# Fallback contextual questions for when Gemini is unavailable
+REFINEMENT_QUESTIONS = (
+    "Are any of these codes closer to what you're looking for?",
+    "Would you like me to search for something more specific?",
+    "Do any of these suggestions match your procedure better?",
+)
+CONSULTATION_QUESTIONS = (
+    "Was this a standard, long, or very long consultation?",
+    "What was the primary reason for the consultation?",
+    "Did the consultation involve any significant mental health component?",
+)
+EXAMINATION_QUESTIONS = (
+    "What type of examination was performed?",
+    "Was this a comprehensive or focused examination?",
+    "Did the examination involve any specific body systems?",
+)
+GENERIC_QUESTIONS = (
+    "What was the primary reason for the procedure?",
+    "Were there any specific requirements or constraints?",
+    "What was the duration or complexity of the procedure?",
+)
+
 
 class NLPService:
     """Service for natural language MBS code search."""
 
+    # Query analyses are reused for repeated queries within this window
+    ANALYSIS_CACHE_TTL_SECONDS = 600.0
+    ANALYSIS_CACHE_MAX_ENTRIES = 1024
+
     def __init__(self):
         """Initialize the NLP service."""
         self.gemini_service = GeminiService()
         self.vector_service = VectorService()
 
+        # query -> (time cached, analysis), least recently used first
+        self._analysis_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = (
+            OrderedDict()
+        )
+        self._analysis_lock = threading.Lock()
+
         logger.info("NLP service initialized successfully")
 
+    def _analyze_query(self, query: str) -> Dict[str, Any]:
+        """Analyze a query with Gemini, reusing a recent analysis of the same query.
+
+        Returns a copy, so callers may add keys. Near-duplicate queries are
+        matched by GeminiService's semantic response cache. Keyword fallbacks
+        for a failed Gemini call are not cached.
+        """
+        now = time.monotonic()
+        with self._analysis_lock:
+            cached = self._analysis_cache.get(query)
+            if cached is not None and now - cached[0] < self.ANALYSIS_CACHE_TTL_SECONDS:
+                self._analysis_cache.move_to_end(query)
+                return dict(cached[1])
+
+        analysis, source = self.gemini_service.analyze_medical_query_result(query)
+        if source == "fallback":
+            # Gemini failed; retry it on the next request instead of caching
+            return analysis
+
+        with self._analysis_lock:
+            self._analysis_cache[query] = (now, dict(analysis))
+            self._analysis_cache.move_to_end(query)
+            if len(self._analysis_cache) > self.ANALYSIS_CACHE_MAX_ENTRIES:
+                self._analysis_cache.popitem(last=False)
+        return analysis
+
     def _validate_mbs_query(self, query: str) -> Dict[str, Any]:
         """Validate that the query is related to MBS codes and medical procedures."""
-        query_lower = query.lower()
-
-        # Medical/MBS related keywords
-        medical_keywords = [
-            "consultation",
-            "examination",
-            "assessment",
-            "treatment",
-            "procedure",
-            "general practitioner",
-            "gp",
-            "specialist",
-            "surgeon",
-            "physician",
-            "chest",
-            "heart",
-            "lung",
-            "abdomen",
-            "head",
-            "neck",
-            "back",
-            "leg",
-            "arm",
-            "pain",
-            "injury",
-            "condition",
-            "disease",
-            "disorder",
-            "syndrome",
-            "diagnosis",
-            "therapy",
-            "surgery",
-            "operation",
-            "intervention",
-            "chronic",
-            "acute",
-            "emergency",
-            "urgent",
-            "routine",
-            "follow-up",
-            "mental health",
-            "psychiatric",
-            "psychological",
-            "counseling",
-            "imaging",
-            "scan",
-            "x-ray",
-            "ultrasound",
-            "mri",
-            "ct",
-            "pet",
-            "blood test",
-            "laboratory",
-            "pathology",
-            "biopsy",
-            "culture",
-            "vaccination",
-            "immunization",
-            "injection",
-            "medication",
-            "prescription",
-            "patient",
-            "medical",
-            "health",
-            "clinical",
-            "hospital",
-            "clinic",
-            "mbs",
-            "item",
-            "code",
-            "billing",
-            "medicare",
-            "fee",
-            "schedule",
-        ]
-
-        # Check if query contains medical keywords
-        has_medical_content = any(
-            keyword in query_lower for keyword in medical_keywords
-        )
-
-        # Non-medical topics to reject
-        non_medical_topics = [
-            "weather",
-            "sports",
-            "cooking",
-            "travel",
-            "shopping",
-            "entertainment",
-            "politics",
-            "finance",
-            "technology",
-            "programming",
-            "coding",
-            "education",
-            "school",
-            "university",
-            "job",
-            "career",
-            "business",
-            "relationship",
-            "dating",
-            "family",
-            "personal",
-            "hobby",
-            "game",
-        ]
-
-        has_non_medical_content = any(
-            topic in query_lower for topic in non_medical_topics
-        )
-
-        if not has_medical_content and len(query.split()) > 3:
+        # Longer queries must mention something medical; the topic check can't
+        # change that outcome, so it only runs for short queries
+        if len(query.split()) > 3:
+            if _MEDICAL_KEYWORDS_RE.search(query):
+                return {"valid": True, "reason": None}
             return {
                 "valid": False,
                 "reason": "This query doesn't appear to be related to medical procedures or MBS codes. Please ask about medical consultations, examinations, treatments, or procedures.",
             }
 
-        if has_non_medical_content and not has_medical_content:
+        # Short queries pass unless they name a non-medical topic and nothing medical
+        off_topic = _NON_MEDICAL_TOPICS_RE.search(query)
+        if off_topic and not _MEDICAL_KEYWORDS_RE.search(query):
             return {
                 "valid": False,
                 "reason": "I can only help with medical procedures and MBS codes. Please ask about consultations, examinations, treatments, or other medical services.",
@@ -164,7 +542,7 @@ class NLPService:
         self, query: str, context: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """Process a natural language query from a doctor."""
-        logger.info(f"Processing natural language query: '{query}'")
+        logger.info("Processing natural language query: '%s'", query)
 
         start_time = time.time()
 
@@ -172,61 +550,132 @@ class NLPService:
             # Step 0: Validate query is MBS-related
             validation = self._validate_mbs_query(query)
             if not validation["valid"]:
-                return {
-                    "query": query,
-                    "suggested_codes": [],
-                    "detailed_suggestions": [],
-                    "follow_up_questions": [],
-                    "context": context or {},
-                    "processing_time_ms": 0,
-                    "error": validation["reason"],
-                }
+                return self._rejected_query(query, context, validation["reason"])
 
             # Step 1: Analyze the query using Gemini
-            analysis = self.gemini_service.analyze_medical_query(query)
+            analysis = self._analyze_query(query)
 
-            # Step 2: Perform vector search
-            search_results = self._perform_vector_search(query, analysis)
+            # Steps 2-4; the vector searches run concurrently with each other
+            return self._complete_query(query, context, analysis, None, start_time)
 
-            # Step 3: Generate code suggestions
-            suggested_codes = self._generate_code_suggestions(
-                query, search_results, analysis
-            )
+        except Exception as e:
+            logger.error(f"Error processing natural language query: {e}")
+            return self._failed_query(query, context, e)
 
-            # Step 4: Generate follow-up questions
-            follow_up_questions = self._generate_follow_up_questions(
-                query, suggested_codes, analysis, context
-            )
+    async def process_natural_language_query_async(
+        self, query: str, context: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Async version of :meth:`process_natural_language_query`.
+
+        The Gemini analysis and the main vector search don't depend on each
+        other, so they run concurrently on anyio's threadpool, whose limiter
+        bounds all of the app's blocking work.
+        """
+        logger.info("Processing natural language query: '%s'", query)
 
-            processing_time = (time.time() - start_time) * 1000
+        start_time = time.time()
 
-            logger.info(
-                f"Processed query in {processing_time:.1f}ms, found {len(suggested_codes)} suggestions"
+        try:
+            validation = self._validate_mbs_query(query)
+            if not validation["valid"]:
+                return self._rejected_query(query, context, validation["reason"])
+
+            analysis, search_results = await asyncio.gather(
+                to_thread.run_sync(self._analyze_query, query),
+                to_thread.run_sync(self._search, query),
             )
 
-            return {
-                "query": query,
-                "suggested_codes": suggested_codes,
-                "detailed_suggestions": self._get_detailed_suggestions(
-                    suggested_codes, query, search_results
-                ),
-                "follow_up_questions": follow_up_questions,
-                "context": context or {},
-                "processing_time_ms": processing_time,
-                "analysis": analysis,
-            }
+            return await to_thread.run_sync(
+                self._complete_query,
+                query,
+                context,
+                analysis,
+                search_results,
+                start_time,
+            )
 
         except Exception as e:
             logger.error(f"Error processing natural language query: {e}")
-            return {
-                "query": query,
-                "suggested_codes": [],
-                "detailed_suggestions": [],
-                "follow_up_questions": [],
-                "context": context or {},
-                "processing_time_ms": 0,
-                "error": str(e),
-            }
+            return self._failed_query(query, context, e)
+
+    def _complete_query(
+        self,
+        query: str,
+        context: Optional[Dict[str, Any]],
+        analysis: Dict[str, Any],
+        search_results: Optional[SearchResults],
+        start_time: float,
+    ) -> Dict[str, Any]:
+        """Steps 2-4 of a natural language query, given its analysis.
+
+        ``search_results`` is the main vector search, if already run.
+        """
+        # Step 2: Perform vector search, adding the analysis-driven search
+        search_results = self._perform_vector_search(query, analysis, search_results)
+
+        # Step 3: Generate code suggestions
+        suggested_codes = self._generate_code_suggestions(
+            query, search_results, analysis
+        )
+
+        # Step 4: Generate follow-up questions
+        follow_up_questions = self._generate_follow_up_questions(
+            query, suggested_codes, analysis, context
+        )
+
+        processing_time = (time.time() - start_time) * 1000
+
+        logger.info(
+            "Processed query in %.1fms, found %d suggestions",
+            processing_time,
+            len(suggested_codes),
+        )
+
+        return {
+            "query": query,
+            "suggested_codes": suggested_codes,
+            "detailed_suggestions": self._get_detailed_suggestions(
+                suggested_codes, query, search_results
+            ),
+            "follow_up_questions": follow_up_questions,
+            "context": context or {},
+            "processing_time_ms": processing_time,
+            "analysis": analysis,
+        }
+
+    @staticmethod
+    def _rejected_query(
+        query: str, context: Optional[Dict[str, Any]], reason: str
+    ) -> Dict[str, Any]:
+        return {
+            "query": query,
+            "suggested_codes": [],
+            "detailed_suggestions": [],
+            "follow_up_questions": [],
+            "context": context or {},
+            "processing_time_ms": 0,
+            "error": reason,
+        }
+
+    @staticmethod
+    def _failed_query(
+        query: str,
+        context: Optional[Dict[str, Any]],
+        error: Exception,
+        conversational: bool = False,
+    ) -> Dict[str, Any]:
+        result = {
+            "query": query,
+            "suggested_codes": [],
+            "detailed_suggestions": [],
+            "follow_up_questions": [],
+            "context": context or {},
+            "processing_time_ms": 0,
+            "error": str(error),
+        }
+        if conversational:
+            result["conversation_context"] = {}
+        return result
 
     def process_conversational_query(
         self,
@@ -235,74 +684,137 @@ class NLPService:
         context: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """Process a conversational query with context from previous messages."""
-        logger.info(f"Processing conversational query: '{query}'")
+        logger.info("Processing conversational query: '%s'", query)
 
         start_time = time.time()
 
         try:
-            # Build context from conversation history
-            conversation_context = self._build_conversation_context(
-                conversation_history, query
+            # Build context from the recent conversation history
+            messages = recent_messages(conversation_history)
+            conversation_context = self._build_conversation_context(messages, query)
+            search_query = self._build_contextual_search_query(
+                query, conversation_context
             )
 
             # Step 1: Analyze the query with conversation context
-            analysis = self.gemini_service.analyze_medical_query(query)
+            analysis = self._analyze_query(query)
+
+            # Steps 2-4; the vector searches run concurrently with each other
+            return self._complete_conversational_query(
+                query,
+                search_query,
+                messages,
+                conversation_context,
+                context,
+                analysis,
+                None,
+                start_time,
+            )
+
+        except Exception as e:
+            logger.error(f"Error processing conversational query: {e}")
+            return self._failed_query(query, context, e, conversational=True)
+
+    async def process_conversational_query_async(
+        self,
+        query: str,
+        conversation_history: List[Dict[str, Any]],
+        context: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Async version of :meth:`process_conversational_query`.
 
-            # Add conversation context to analysis
-            analysis["conversation_context"] = conversation_context
+        The Gemini analysis and the contextual vector search run concurrently.
+        """
+        logger.info("Processing conversational query: '%s'", query)
 
-            # Step 2: Perform vector search with conversation context
+        start_time = time.time()
+
+        try:
+            messages = recent_messages(conversation_history)
+            conversation_context = self._build_conversation_context(messages, query)
             search_query = self._build_contextual_search_query(
                 query, conversation_context
             )
-            search_results = self._perform_vector_search(search_query, analysis)
 
-            # Step 3: Generate code suggestions
-            suggested_codes = self._generate_code_suggestions(
-                query, search_results, analysis
+            analysis, search_results = await asyncio.gather(
+                to_thread.run_sync(self._analyze_query, query),
+                to_thread.run_sync(self._search, search_query),
             )
 
-            # Step 4: Generate contextual follow-up questions
-            follow_up_questions = self._generate_contextual_follow_up_questions(
-                query, suggested_codes, analysis, conversation_history, context
+            return await to_thread.run_sync(
+                self._complete_conversational_query,
+                query,
+                search_query,
+                messages,
+                conversation_context,
+                context,
+                analysis,
+                search_results,
+                start_time,
             )
 
-            processing_time = (time.time() - start_time) * 1000
+        except Exception as e:
+            logger.error(f"Error processing conversational query: {e}")
+            return self._failed_query(query, context, e, conversational=True)
 
-            logger.info(
-                f"Processed conversational query in {processing_time:.1f}ms, found {len(suggested_codes)} suggestions"
-            )
+    def _complete_conversational_query(
+        self,
+        query: str,
+        search_query: str,
+        messages: List[ConversationMessage],
+        conversation_context: Dict[str, Any],
+        context: Optional[Dict[str, Any]],
+        analysis: Dict[str, Any],
+        search_results: Optional[SearchResults],
+        start_time: float,
+    ) -> Dict[str, Any]:
+        """Steps 2-4 of a conversational query, given its analysis.
 
-            return {
-                "query": query,
-                "suggested_codes": suggested_codes,
-                "detailed_suggestions": self._get_detailed_suggestions(
-                    suggested_codes, query, search_results
-                ),
-                "follow_up_questions": follow_up_questions,
-                "context": context or {},
-                "conversation_context": conversation_context,
-                "processing_time_ms": processing_time,
-                "analysis": analysis,
-            }
+        ``search_results`` is the main vector search, if already run.
+        """
+        # Add conversation context to analysis
+        analysis["conversation_context"] = conversation_context
 
-        except Exception as e:
-            logger.error(f"Error processing conversational query: {e}")
-            return {
-                "query": query,
-                "suggested_codes": [],
-                "detailed_suggestions": [],
-                "follow_up_questions": [],
-                "context": context or {},
-                "conversation_context": {},
-                "processing_time_ms": 0,
-                "error": str(e),
-            }
+        # Step 2: Perform vector search, adding the analysis-driven search
+        search_results = self._perform_vector_search(
+            search_query, analysis, search_results
+        )
+
+        # Step 3: Generate code suggestions
+        suggested_codes = self._generate_code_suggestions(
+            query, search_results, analysis
+        )
+
+        # Step 4: Generate contextual follow-up questions
+        follow_up_questions = self._generate_contextual_follow_up_questions(
+            query, suggested_codes, analysis, messages, context
+        )
+
+        processing_time = (time.time() - start_time) * 1000
+
+        logger.info(
+            "Processed conversational query in %.1fms, found %d suggestions",
+            processing_time,
+            len(suggested_codes),
+        )
+
+        return {
+            "query": query,
+            "suggested_codes": suggested_codes,
+            "detailed_suggestions": self._get_detailed_suggestions(
+                suggested_codes, query, search_results
+            ),
+            "follow_up_questions": follow_up_questions,
+            "context": context or {},
+            "conversation_context": conversation_context,
+            "processing_time_ms": processing_time,
+            "analysis": analysis,
+        }
 
     def _build_conversation_context(
-        self, conversation_history: List[Dict[str, Any]], current_query: str
+        self, messages: List[ConversationMessage], current_query: str
     ) -> Dict[str, Any]:
-        """Build context from conversation history."""
+        """Build context from the recent messages of the conversation."""
         context = {
             "previous_queries": [],
             "previous_suggestions": [],
@@ -310,17 +822,17 @@ class NLPService:
             "current_focus": None,
         }
 
-        if not conversation_history:
+        if not messages:
             return context
 
         # Extract previous queries and suggestions
-        for message in conversation_history[-5:]:  # Last 5 messages for context
-            if message.get("type") == "user":
-                context["previous_queries"].append(message.get("content", ""))
-            elif message.get("type") == "assistant":
-                suggestions = message.get("suggested_codes", [])
-                if suggestions:
-                    context["previous_suggestions"].extend(suggestions)
+        previous_queries = context["previous_queries"]
+        previous_suggestions = context["previous_suggestions"]
+        for message_type, content, suggestions in messages:
+            if message_type == "user":
+                previous_queries.append(content)
+            elif message_type == "assistant" and suggestions:
+                previous_suggestions.extend(suggestions)
 
         # Count refinement attempts
         context["refinement_attempts"] = len(context["previous_queries"])
@@ -350,7 +862,7 @@ class NLPService:
         query: str,
         suggested_codes: List[str],
         analysis: Dict[str, Any],
-        conversation_history: List[Dict[str, Any]],
+        messages: List[ConversationMessage],
         context: Optional[Dict[str, Any]],
     ) -> List[str]:
         """Generate follow-up questions that are contextually aware of the conversation."""
@@ -359,7 +871,7 @@ class NLPService:
                 return []
 
             # Build conversation context for follow-up generation
-            conversation_summary = self._summarize_conversation(conversation_history)
+            conversation_summary = self._summarize_conversation(messages)
 
             # Use Gemini to generate contextual follow-up questions
             system_prompt = f"""
@@ -379,7 +891,7 @@ class NLPService:
             """
 
             response = self.gemini_service.generate_structured_response(
-                query, system_prompt
+                query, system_prompt, max_tokens=FOLLOW_UP_MAX_TOKENS
             )
 
             if response["success"]:
@@ -387,7 +899,7 @@ class NLPService:
                     q.strip() for q in response["content"].split("\n") if q.strip()
                 ]
                 logger.info(
-                    f"Generated {len(questions)} contextual follow-up questions"
+                    "Generated %d contextual follow-up questions", len(questions)
                 )
                 return questions
             else:
@@ -395,33 +907,27 @@ class NLPService:
                     f"Failed to generate contextual follow-up questions: {response.get('error', 'Unknown error')}"
                 )
                 return self._generate_basic_contextual_questions(
-                    query, suggested_codes, conversation_history
+                    query, suggested_codes, messages
                 )
 
         except Exception as e:
             logger.error(f"Error generating contextual follow-up questions: {e}")
             return self._generate_basic_contextual_questions(
-                query, suggested_codes, conversation_history
+                query, suggested_codes, messages
             )
 
-    def _summarize_conversation(
-        self, conversation_history: List[Dict[str, Any]]
-    ) -> str:
+    def _summarize_conversation(self, messages: List[ConversationMessage]) -> str:
         """Summarize the conversation history for context."""
-        if not conversation_history:
+        if not messages:
             return "No previous conversation"
 
         summary_parts = []
 
-        for message in conversation_history[-3:]:  # Last 3 messages
-            if message.get("type") == "user":
-                summary_parts.append(f"Doctor asked: {message.get('content', '')}")
-            elif message.get("type") == "assistant":
-                suggestions = message.get("suggested_codes", [])
-                if suggestions:
-                    summary_parts.append(
-                        f"Suggested codes: {', '.join(suggestions[:3])}"
-                    )
+        for message_type, content, suggestions in messages[-3:]:  # Last 3 messages
+            if message_type == "user":
+                summary_parts.append(f"Doctor asked: {content}")
+            elif message_type == "assistant" and suggestions:
+                summary_parts.append(f"Suggested codes: {', '.join(suggestions[:3])}")
 
         return "; ".join(summary_parts)
 
@@ -429,110 +935,100 @@ class NLPService:
         self,
         query: str,
         suggested_codes: List[str],
-        conversation_history: List[Dict[str, Any]],
+        messages: List[ConversationMessage],
     ) -> List[str]:
         """Generate basic contextual questions when AI is not available."""
-        questions = []
-
         # Check if this is a refinement attempt
-        if len(conversation_history) > 1:
-            questions.extend(
-                [
-                    "Are any of these codes closer to what you're looking for?",
-                    "Would you like me to search for something more specific?",
-                    "Do any of these suggestions match your procedure better?",
-                ]
+        if len(messages) > 1:
+            return list(REFINEMENT_QUESTIONS)
+
+        # First-time questions
+        query_lower = _query_terms(query).lower
+        if "consultation" in query_lower:
+            return list(CONSULTATION_QUESTIONS)
+        if "examination" in query_lower:
+            return list(EXAMINATION_QUESTIONS)
+        return list(GENERIC_QUESTIONS)
+
+    def _search(self, query: str) -> SearchResults:
+        """Main vector search for a query; empty results on failure."""
+        try:
+            return self.vector_service.search(
+                query=query, max_results=20, as_soa=True, include_documents=False
             )
-        else:
-            # First-time questions
-            query_lower = query.lower()
-
-            if "consultation" in query_lower:
-                questions.extend(
-                    [
-                        "Was this a standard, long, or very long consultation?",
-                        "What was the primary reason for the consultation?",
-                        "Did the consultation involve any significant mental health component?",
-                    ]
-                )
-            elif "examination" in query_lower:
-                questions.extend(
-                    [
-                        "What type of examination was performed?",
-                        "Was this a comprehensive or focused examination?",
-                        "Did the examination involve any specific body systems?",
-                    ]
-                )
-            else:
-                questions.extend(
-                    [
-                        "What was the primary reason for the procedure?",
-                        "Were there any specific requirements or constraints?",
-                        "What was the duration or complexity of the procedure?",
-                    ]
-                )
-
-        return questions[:5]  # Limit to 5 questions
+        except Exception as e:
+            logger.error(f"Error performing vector search: {e}")
+            return SearchResults()
 
     def _perform_vector_search(
-        self, query: str, analysis: Dict[str, Any]
-    ) -> List[Dict[str, Any]]:
-        """Perform vector search using the vector database."""
+        self,
+        query: str,
+        analysis: Dict[str, Any],
+        search_results: Optional[SearchResults] = None,
+    ) -> SearchResults:
+        """Perform vector search using the vector database.
+
+        ``search_results`` is the main search for ``query`` when the caller has
+        already run it; otherwise it runs here, alongside the provider search.
+        """
+        provider_query = self._provider_query(analysis)
+        provider_results = None
+        if search_results is None and provider_query is not None:
+            # The two searches are independent; run the main one in a worker
+            main_search = _SEARCH_POOL.submit(self._search, query)
+            provider_results = self._provider_search(provider_query)
+            search_results = main_search.result()
+        else:
+            if search_results is None:
+                search_results = self._search(query)
+            if provider_query is not None:
+                provider_results = self._provider_search(provider_query)
+
+        # Merge results, avoiding duplicates
+        if provider_results is not None:
+            search_results.extend_unique(provider_results)
+
+        logger.info("Found %d vector search results", len(search_results))
+        return search_results
+
+    @staticmethod
+    def _provider_query(analysis: Dict[str, Any]) -> Optional[str]:
+        """Query for a targeted search on the analysed provider type, if any."""
+        if analysis and analysis.get("provider_type"):
+            return f"{analysis['provider_type']} {analysis.get('procedure_type', '')}"
+        return None
+
+    def _provider_search(self, provider_query: str) -> Optional[SearchResults]:
+        """Targeted search for the analysed provider type."""
         try:
-            # Perform main search
-            search_results = self.vector_service.search(
-                query=query,
-                max_results=20,
+            return self.vector_service.search(
+                query=provider_query,
+                max_results=5,
+                as_soa=True,
+                include_documents=False,
             )
 
-            # If we have analysis results, try additional targeted searches
-            if analysis and "provider_type" in analysis and analysis["provider_type"]:
-                provider_type = analysis["provider_type"]
-                provider_results = self.vector_service.search(
-                    query=f"{provider_type} {analysis.get('procedure_type', '')}",
-                    max_results=5,
-                )
-
-                # Merge results, avoiding duplicates
-                existing_ids = {result["id"] for result in search_results}
-                for result in provider_results:
-                    if result["id"] not in existing_ids:
-                        search_results.append(result)
-
-            logger.info(f"Found {len(search_results)} vector search results")
-            return search_results
-
         except Exception as e:
             logger.error(f"Error performing vector search: {e}")
-            return []
+            return None
 
     def _generate_code_suggestions(
-        self, query: str, search_results: List[Dict[str, Any]], analysis: Dict[str, Any]
+        self, query: str, search_results: SearchResults, analysis: Dict[str, Any]
     ) -> List[str]:
         """Generate MBS code suggestions based on search results."""
         try:
             if not search_results:
                 return []
 
-            # Extract item numbers from search results
-            suggested_items = []
-            for result in search_results[:10]:  # Limit to top 10
-                item_num = result["metadata"].get("item_num")
-                if item_num:
-                    suggested_items.append(item_num)
-
-            # Use Gemini to refine suggestions
-            if suggested_items:
-                gemini_suggestions = self.gemini_service.generate_follow_up_questions(
-                    query=query, suggested_codes=suggested_items, context=analysis
-                )
+            # Extract item numbers from the top 10 search results
+            suggested_items = [
+                item_num for item_num in search_results.item_nums[:10] if item_num
+            ]
 
-                # For now, return the original suggestions (Gemini refinement can be added later)
-                all_suggestions = list(set(suggested_items))
-            else:
-                all_suggestions = []
+            # Deduplicate keeping each item's best-ranked position
+            all_suggestions = list(dict.fromkeys(suggested_items))
 
-            logger.info(f"Generated {len(all_suggestions)} code suggestions")
+            logger.info("Generated %d code suggestions", len(all_suggestions))
             return all_suggestions[:15]  # Limit to 15 suggestions
 
         except Exception as e:
@@ -556,7 +1052,7 @@ class NLPService:
                 query=query, suggested_codes=suggested_codes, context=analysis
             )
 
-            logger.info(f"Generated {len(questions)} follow-up questions")
+            logger.info("Generated %d follow-up questions", len(questions))
             return questions
 
         except Exception as e:
@@ -567,36 +1063,49 @@ class NLPService:
         self,
         suggested_codes: List[str],
         query: str,
-        search_results: List[Dict[str, Any]],
+        search_results: SearchResults,
     ) -> List[Dict[str, Any]]:
         """Get detailed suggestions for MBS codes."""
         suggestions = []
+        if not search_results or not suggested_codes:
+            return suggestions
+
+        # Query-side scoring terms and the score lookup are built once per
+        # request rather than once per suggested code
+        query_terms = _query_terms(query)
+        score_by_item: Dict[str, float] = {}
+        for item_num, score in zip(search_results.item_nums, search_results.scores):
+            score_by_item.setdefault(item_num, score)
+
+        # Only codes the search actually retrieved are worth fetching
+        suggested_codes = [code for code in suggested_codes if code in score_by_item]
+        if not suggested_codes:
+            return suggestions
+
+        # Detailed information for every suggested code in one batch of queries
+        try:
+            aggregates = fetch_items_aggregate(suggested_codes)
+        except Exception as e:
+            logger.error(f"Error fetching suggested codes {suggested_codes}: {e}")
+            return suggestions
 
         for item_num in suggested_codes:
             try:
-                # Get detailed information for this code
-                item_data = fetch_item_aggregate(item_num)
-                if not item_data or not item_data[0]:
+                item_data = aggregates.get(item_num)
+                if not item_data:
                     continue
 
                 item_row, rel_rows, con_rows = item_data
                 description = item_row[4] or "No description available"
 
-                # Find the search result for this item
-                search_result = None
-                for result in search_results:
-                    if result.get("metadata", {}).get("item_num") == item_num:
-                        search_result = result
-                        break
-
                 # Calculate confidence based on actual similarity
                 confidence = self._calculate_confidence_score(
-                    query, description, search_result
+                    query, description, score_by_item.get(item_num), query_terms
                 )
 
                 # Generate meaningful reasoning based on matching words
                 reasoning = self._generate_meaningful_reasoning(
-                    query, description, item_num
+                    query, description, item_num, query_terms
                 )
 
                 suggestion = {
@@ -616,70 +1125,36 @@ class NLPService:
         return suggestions
 
     def _calculate_confidence_score(
-        self, query: str, description: str, search_result: Dict[str, Any]
+        self,
+        query: str,
+        description: str,
+        similarity_score: Optional[float],
+        query_terms: Optional[QueryTerms] = None,
     ) -> float:
         """Calculate a realistic confidence score based on actual similarity."""
+        if similarity_score is None:
+            return 50.0  # No search result to score against
+
         try:
-            # Get the similarity score from the search result
-            similarity_score = search_result.get("similarity_score", 0.0)
+            if query_terms is None:
+                query_terms = _query_terms(query)
 
             # Convert similarity to confidence percentage (0-100%)
             # Similarity scores are typically 0-1, so multiply by 100
             base_confidence = similarity_score * 100
 
             # Apply additional factors for more realistic scoring
-            query_lower = query.lower()
-            description_lower = description.lower()
-
-            # Bonus for exact word matches
-            query_words = set(query_lower.split())
-            description_words = set(description_lower.split())
-            common_words = query_words.intersection(description_words)
+            description_terms = _description_terms(description)
 
-            # Filter meaningful words
-            meaningful_words = [word for word in common_words if len(word) > 3]
+            # Bonus for exact meaningful word matches
+            meaningful_words = query_terms.words & description_terms.words
             word_match_bonus = min(len(meaningful_words) * 5, 20)  # Max 20% bonus
 
-            # Bonus for medical term matches
-            medical_terms = [
-                "consultation",
-                "examination",
-                "assessment",
-                "treatment",
-                "procedure",
-                "general practitioner",
-                "gp",
-                "specialist",
-                "surgeon",
-                "physician",
-                "chest",
-                "heart",
-                "lung",
-                "abdomen",
-                "head",
-                "neck",
-                "back",
-                "leg",
-                "arm",
-                "pain",
-                "injury",
-                "condition",
-                "disease",
-                "disorder",
-                "syndrome",
-                "diagnosis",
-                "therapy",
-                "surgery",
-                "operation",
-                "intervention",
-            ]
-
-            medical_match_bonus = 0
-            for term in medical_terms:
-                if term in query_lower and term in description_lower:
-                    medical_match_bonus += 10
-
-            medical_match_bonus = min(medical_match_bonus, 30)  # Max 30% bonus
+            # Bonus for medical term matches (terms present in the query)
+            matching_medical_terms = (
+                query_terms.medical_terms & description_terms.medical_terms
+            )
+            medical_match_bonus = min(len(matching_medical_terms) * 10, 30)  # Max 30%
 
             # Calculate final confidence
             final_confidence = base_confidence + word_match_bonus + medical_match_bonus
@@ -697,254 +1172,38 @@ class NLPService:
             return 50.0  # Default fallback
 
     def _generate_meaningful_reasoning(
-        self, query: str, description: str, item_num: str
+        self,
+        query: str,
+        description: str,
+        item_num: str,
+        query_terms: Optional[QueryTerms] = None,
     ) -> str:
         """Generate meaningful reasoning showing why this code was suggested."""
         try:
-            # Convert both to lowercase for comparison
-            query_lower = query.lower()
-            description_lower = description.lower()
-
-            # Find matching words/phrases
-            matching_terms = []
-
-            # Common medical terms to look for
-            medical_terms = [
-                "consultation",
-                "examination",
-                "assessment",
-                "treatment",
-                "procedure",
-                "general practitioner",
-                "gp",
-                "specialist",
-                "surgeon",
-                "physician",
-                "chest",
-                "heart",
-                "lung",
-                "abdomen",
-                "head",
-                "neck",
-                "back",
-                "leg",
-                "arm",
-                "pain",
-                "injury",
-                "condition",
-                "disease",
-                "disorder",
-                "syndrome",
-                "diagnosis",
-                "therapy",
-                "surgery",
-                "operation",
-                "intervention",
-                "chronic",
-                "acute",
-                "emergency",
-                "urgent",
-                "routine",
-                "follow-up",
-                "mental health",
-                "psychiatric",
-                "psychological",
-                "counseling",
-                "imaging",
-                "scan",
-                "x-ray",
-                "ultrasound",
-                "mri",
-                "ct",
-                "pet",
-                "blood test",
-                "laboratory",
-                "pathology",
-                "biopsy",
-                "culture",
-                "vaccination",
-                "immunization",
-                "injection",
-                "medication",
-                "prescription",
+            # Query-side terms are shared across a request's suggestions
+            if query_terms is None:
+                query_terms = _query_terms(query)
+            description_terms = _description_terms(description)
+
+            # Medical terms found in both, in order of appearance in the query
+            matching_terms = [
+                term
+                for term in query_terms.reasoning_terms
+                if term in description_terms.medical_terms
             ]
 
-            # Check for exact matches
-            for term in medical_terms:
-                if term in query_lower and term in description_lower:
-                    matching_terms.append(term)
-
-            # Check for partial matches (words that appear in both)
-            query_words = set(query_lower.split())
-            description_words = set(description_lower.split())
-            common_words = query_words.intersection(description_words)
-
-            # Filter out common words that aren't meaningful
+            # Check for partial matches: the query's meaningful words (over
+            # three letters, not stopwords) that appear in the description
             meaningful_words = [
                 word
-                for word in common_words
-                if len(word) > 3
-                and word
-                not in [
-                    "the",
-                    "and",
-                    "for",
-                    "with",
-                    "this",
-                    "that",
-                    "from",
-                    "they",
-                    "have",
-                    "been",
-                    "were",
-                    "said",
-                    "each",
-                    "which",
-                    "their",
-                    "time",
-                    "will",
-                    "about",
-                    "there",
-                    "could",
-                    "other",
-                    "after",
-                    "first",
-                    "well",
-                    "also",
-                    "where",
-                    "much",
-                    "some",
-                    "very",
-                    "when",
-                    "here",
-                    "just",
-                    "into",
-                    "over",
-                    "think",
-                    "back",
-                    "then",
-                    "them",
-                    "these",
-                    "so",
-                    "its",
-                    "now",
-                    "find",
-                    "any",
-                    "new",
-                    "work",
-                    "part",
-                    "take",
-                    "get",
-                    "place",
-                    "made",
-                    "live",
-                    "where",
-                    "after",
-                    "back",
-                    "little",
-                    "only",
-                    "round",
-                    "man",
-                    "year",
-                    "came",
-                    "show",
-                    "every",
-                    "good",
-                    "me",
-                    "give",
-                    "our",
-                    "under",
-                    "name",
-                    "very",
-                    "through",
-                    "just",
-                    "form",
-                    "sentence",
-                    "great",
-                    "think",
-                    "say",
-                    "help",
-                    "low",
-                    "line",
-                    "differ",
-                    "turn",
-                    "cause",
-                    "much",
-                    "mean",
-                    "before",
-                    "move",
-                    "right",
-                    "boy",
-                    "old",
-                    "too",
-                    "same",
-                    "she",
-                    "all",
-                    "there",
-                    "when",
-                    "up",
-                    "use",
-                    "word",
-                    "how",
-                    "said",
-                    "an",
-                    "each",
-                    "which",
-                    "she",
-                    "do",
-                    "how",
-                    "their",
-                    "if",
-                    "will",
-                    "up",
-                    "other",
-                    "about",
-                    "out",
-                    "many",
-                    "then",
-                    "them",
-                    "can",
-                    "only",
-                    "other",
-                    "new",
-                    "some",
-                    "what",
-                    "time",
-                    "very",
-                    "when",
-                    "much",
-                    "then",
-                    "no",
-                    "way",
-                    "could",
-                    "people",
-                    "my",
-                    "than",
-                    "first",
-                    "water",
-                    "been",
-                    "call",
-                    "who",
-                    "oil",
-                    "sit",
-                    "now",
-                    "find",
-                    "long",
-                    "down",
-                    "day",
-                    "did",
-                    "get",
-                    "come",
-                    "made",
-                    "may",
-                    "part",
-                ]
+                for word in query_terms.reasoning_words
+                if word in description_terms.words
             ]
 
             matching_terms.extend(meaningful_words[:3])  # Limit to top 3
 
-            # Remove duplicates and limit
-            matching_terms = list(set(matching_terms))[:5]
+            # Remove duplicates, keeping query order, and limit
+            matching_terms = list(dict.fromkeys(matching_terms))[:5]
 
             if matching_terms:
                 if len(matching_terms) == 1:
@@ -955,32 +1214,9 @@ class NLPService:
                     reasoning = f"Matched based on: '{', '.join(matching_terms[:-1])}', and '{matching_terms[-1]}'"
             else:
                 # More specific fallback based on content analysis
-                if (
-                    "consultation" in query_lower
-                    and "consultation" in description_lower
-                ):
-                    reasoning = "Matched based on consultation-related content"
-                elif (
-                    "examination" in query_lower and "examination" in description_lower
-                ):
-                    reasoning = "Matched based on examination-related content"
-                elif "surgery" in query_lower and "surgery" in description_lower:
-                    reasoning = "Matched based on surgical procedure content"
-                elif (
-                    "general practitioner" in query_lower
-                    and "general practitioner" in description_lower
-                ):
-                    reasoning = "Matched based on general practitioner services"
-                else:
-                    # Analyze the type of content
-                    if "professional attendance" in description_lower:
-                        reasoning = "Matched based on professional attendance services"
-                    elif "procedure" in description_lower:
-                        reasoning = "Matched based on medical procedure content"
-                    elif "treatment" in description_lower:
-                        reasoning = "Matched based on treatment-related services"
-                    else:
-                        reasoning = "Matched based on medical service content"
+                reasoning = _fallback_reasoning(
+                    query_terms.topics, description_terms.topics
+                )
 
             return reasoning
 
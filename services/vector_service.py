@@ -5,18 +5,18 @@ This module handles ChromaDB operations for vector storage and semantic search.
 """
 
 import logging
-import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 import chromadb
+import numpy as np
 from chromadb.config import Settings
 
-import sys
-import os
-
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 from config import settings
-from services.gemini_service import GeminiService
+from services.gemini_service import GeminiService, get_embedding_cache
 
 logger = logging.getLogger(__name__)
 
@@ -30,9 +30,80 @@ except ImportError:
     logger.warning("sentence-transformers not available. Local embeddings disabled.")
 
 
+@lru_cache(maxsize=4)
+def _load_local_model(model_name: str) -> "SentenceTransformer":
+    """Load a SentenceTransformer once per process, shared by every VectorService."""
+    return SentenceTransformer(model_name)
+
+
+# Held while loading, so a request that arrives during the startup warm-up waits
+# for that load instead of starting a second one
+_local_model_lock = threading.Lock()
+
+
+@dataclass
+class SearchResults:
+    """Search results stored column-wise, with every list aligned by index.
+
+    Ranking and filtering work on the columns directly; ``to_dicts`` rebuilds
+    the per-result dicts only where a caller needs them.
+    """
+
+    ids: List[str] = field(default_factory=list)
+    item_nums: List[Optional[str]] = field(default_factory=list)
+    contents: List[str] = field(default_factory=list)
+    metadatas: List[Dict[str, Any]] = field(default_factory=list)
+    scores: List[float] = field(default_factory=list)
+    distances: List[float] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def extend_unique(self, other: "SearchResults") -> None:
+        """Append results from ``other`` whose ids are not already present.
+
+        Duplicates within ``other`` are dropped too; the first occurrence wins.
+        """
+        seen = set(self.ids)
+        new_rows = [
+            i
+            for i, result_id in enumerate(other.ids)
+            if result_id not in seen and not seen.add(result_id)
+        ]
+        if not new_rows:
+            return
+        for name in ("ids", "item_nums", "contents", "metadatas", "scores", "distances"):
+            column = getattr(other, name)
+            getattr(self, name).extend([column[i] for i in new_rows])
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Rebuild the list-of-dicts form returned by ``VectorService.search``."""
+        return [
+            {
+                "id": result_id,
+                "content": content,
+                "metadata": metadata,
+                "similarity_score": score,
+                "distance": distance,
+            }
+            for result_id, content, metadata, score, distance in zip(
+                self.ids, self.contents, self.metadatas, self.scores, self.distances
+            )
+        ]
+
+
 class VectorService:
     """Service for vector database operations using ChromaDB."""
 
+    # Collection stats sample up to 100 records; reuse them between status polls
+    STATS_CACHE_TTL_SECONDS = 30.0
+
+    # Sentences per forward pass when embedding documents with the local model
+    LOCAL_ENCODE_BATCH_SIZE = 64
+
+    # Records per collection.add call; one huge add stalls on segment writes
+    CHROMA_ADD_BATCH_SIZE = 128
+
     def __init__(self):
         """Initialize the vector service."""
         self.persist_directory = settings.CHROMA_PERSIST_DIRECTORY
@@ -42,6 +113,9 @@ class VectorService:
         # Initialize local embedding model if available and configured
         self.local_embedding_model = None
         self._model_loaded = False
+
+        self._stats_cache: Optional[Dict[str, Any]] = None
+        self._stats_cached_at = 0.0
         
         # Initialize ChromaDB client
         self.client = chromadb.PersistentClient(
@@ -73,15 +147,64 @@ class VectorService:
         if settings.USE_LOCAL_EMBEDDINGS and SENTENCE_TRANSFORMERS_AVAILABLE:
             try:
                 logger.info("Loading embedding model on first use...")
-                self.local_embedding_model = SentenceTransformer(
-                    settings.LOCAL_EMBEDDING_MODEL
-                )
+                with _local_model_lock:
+                    self.local_embedding_model = _load_local_model(
+                        settings.LOCAL_EMBEDDING_MODEL
+                    )
                 logger.info(f"Local embedding model loaded: {settings.LOCAL_EMBEDDING_MODEL}")
                 self._model_loaded = True
             except Exception as e:
                 logger.warning(f"Failed to load local embedding model: {e}")
                 self.local_embedding_model = None
 
+    def warm_up(self) -> None:
+        """Load the local embedding model and run one encode ahead of real traffic."""
+        self._ensure_model_loaded()
+        if self.local_embedding_model:
+            try:
+                self.local_embedding_model.encode(["warm up"])
+                logger.info("Local embedding model warmed up")
+            except Exception as e:
+                logger.warning(f"Embedding model warm-up failed: {e}")
+
+    def _encode_local(self, texts: List[str], persist: bool = True) -> np.ndarray:
+        """Embed texts with the local model, one row per text.
+
+        Vectors come from the shared embedding cache where present; each distinct
+        uncached text is encoded once and cached under the local model's name.
+        With ``persist`` false new vectors are cached in memory only, keeping
+        disk writes off the search path.
+        """
+        cache = get_embedding_cache()
+        model = settings.LOCAL_EMBEDDING_MODEL
+        keys = [cache.key(model, text) for text in texts]
+        vectors = cache.get_many(keys)
+
+        # Unique uncached texts, in first-seen order
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+
+        if missing:
+            # encode() already groups sentences of similar length into each
+            # batch and restores the input order, so padding stays low
+            encoded = self.local_embedding_model.encode(
+                list(missing.values()),
+                batch_size=self.LOCAL_ENCODE_BATCH_SIZE,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+            fetched = dict(zip(missing, np.asarray(encoded, dtype=np.float32)))
+            cache.put_many(model, fetched, persist=persist)
+            vectors.update(fetched)
+
+        logger.info(
+            f"Local embeddings: {len(texts) - len(missing)} cached, "
+            f"{len(missing)} encoded"
+        )
+        return np.stack([vectors[key] for key in keys])
+
     def add_documents(self, documents: List[Dict[str, Any]]) -> bool:
         """Add documents to the vector database."""
         try:
@@ -111,23 +234,25 @@ class VectorService:
                 
             if self.local_embedding_model:
                 try:
-                    embeddings = self.local_embedding_model.encode(texts)
-                    embeddings = embeddings.tolist()
-                    logger.info(
-                        f"Generated {len(embeddings)} embeddings using local model"
-                    )
+                    embeddings = self._encode_local(texts).tolist()
                 except Exception as e:
                     logger.warning(
                         f"Local embedding failed, falling back to Gemini: {e}"
                     )
-                    embeddings = self.gemini_service.get_embeddings(texts)
+                    embeddings = self.gemini_service.get_embeddings(texts).tolist()
             else:
-                embeddings = self.gemini_service.get_embeddings(texts)
+                embeddings = self.gemini_service.get_embeddings(texts).tolist()
 
             # Add to collection
-            self.collection.add(
-                ids=ids, embeddings=embeddings, documents=texts, metadatas=metadatas
-            )
+            for start in range(0, len(ids), self.CHROMA_ADD_BATCH_SIZE):
+                end = start + self.CHROMA_ADD_BATCH_SIZE
+                self.collection.add(
+                    ids=ids[start:end],
+                    embeddings=embeddings[start:end],
+                    documents=texts[start:end],
+                    metadatas=metadatas[start:end],
+                )
+            self._stats_cache = None
 
             logger.info(
                 f"Successfully added {len(documents)} documents to vector database"
@@ -143,8 +268,16 @@ class VectorService:
         query: str,
         max_results: int = 10,
         filters: Optional[Dict[str, Any]] = None,
-    ) -> List[Dict[str, Any]]:
-        """Search the vector database."""
+        as_soa: bool = False,
+        include_documents: bool = True,
+    ) -> Any:
+        """Search the vector database.
+
+        Returns a list of result dicts, or a column-wise ``SearchResults`` when
+        ``as_soa`` is true. Callers that only rank by metadata can pass
+        ``include_documents=False`` to skip fetching document text; contents
+        are then empty strings.
+        """
         try:
             logger.info(f"Searching vector database: '{query}'")
 
@@ -155,7 +288,7 @@ class VectorService:
             # Generate query embedding using Gemini or local model
             if self.local_embedding_model:
                 try:
-                    query_embedding = self.local_embedding_model.encode([query])[
+                    query_embedding = self._encode_local([query], persist=False)[
                         0
                     ].tolist()
                     logger.info("Generated query embedding using local model")
@@ -164,10 +297,10 @@ class VectorService:
                         f"Local embedding failed, falling back to Gemini: {e}"
                     )
                     query_embeddings = self.gemini_service.get_embeddings([query])
-                    query_embedding = query_embeddings[0]
+                    query_embedding = query_embeddings[0].tolist()
             else:
                 query_embeddings = self.gemini_service.get_embeddings([query])
-                query_embedding = query_embeddings[0]
+                query_embedding = query_embeddings[0].tolist()
 
             # Prepare where clause for filtering
             where_clause = {}
@@ -176,68 +309,75 @@ class VectorService:
                     where_clause[key] = value
 
             # Perform search
+            include = ["metadatas", "distances"]
+            if include_documents:
+                include.append("documents")
             results = self.collection.query(
                 query_embeddings=[query_embedding],
                 n_results=max_results,
                 where=where_clause if where_clause else None,
-                include=["documents", "metadatas", "distances"],
+                include=include,
             )
 
-            # Convert results to our format
-            search_results = []
-            if results["documents"] and results["documents"][0]:
-                for i, (doc, metadata, distance) in enumerate(
-                    zip(
-                        results["documents"][0],
-                        results["metadatas"][0],
-                        results["distances"][0],
-                    )
-                ):
+            # Keep ChromaDB's column-wise results as columns
+            search_results = SearchResults()
+            if results["ids"] and results["ids"][0]:
+                metadatas = results["metadatas"][0]
+                distances = results["distances"][0]
+                search_results = SearchResults(
+                    ids=[
+                        metadata.get("id", f"result_{i}")
+                        for i, metadata in enumerate(metadatas)
+                    ],
+                    item_nums=[metadata.get("item_num") for metadata in metadatas],
+                    contents=(
+                        list(results["documents"][0])
+                        if include_documents
+                        else [""] * len(metadatas)
+                    ),
+                    metadatas=list(metadatas),
                     # Convert distance to similarity score (ChromaDB uses cosine distance)
-                    similarity_score = 1 - distance
-
-                    search_results.append(
-                        {
-                            "id": metadata.get("id", f"result_{i}"),
-                            "content": doc,
-                            "metadata": metadata,
-                            "similarity_score": similarity_score,
-                            "distance": distance,
-                        }
-                    )
+                    scores=[1 - distance for distance in distances],
+                    distances=list(distances),
+                )
 
             logger.info(f"Found {len(search_results)} results")
-            return search_results
+            return search_results if as_soa else search_results.to_dicts()
 
         except Exception as e:
             logger.error(f"Error searching vector database: {e}")
-            return []
+            return SearchResults() if as_soa else []
 
     def get_collection_stats(self) -> Dict[str, Any]:
         """Get statistics about the collection."""
+        if (
+            self._stats_cache is not None
+            and time.monotonic() - self._stats_cached_at < self.STATS_CACHE_TTL_SECONDS
+        ):
+            return self._stats_cache
+
         try:
             count = self.collection.count()
 
             # Get sample of metadata to understand data distribution
             sample_results = self.collection.get(limit=100, include=["metadatas"])
 
-            chunk_types = {}
-            item_nums = set()
-
-            if sample_results["metadatas"]:
-                for metadata in sample_results["metadatas"]:
-                    chunk_type = metadata.get("chunk_type", "unknown")
-                    chunk_types[chunk_type] = chunk_types.get(chunk_type, 0) + 1
-                    item_nums.add(metadata.get("item_num", ""))
+            metadatas = sample_results["metadatas"] or []
+            chunk_types = Counter(
+                metadata.get("chunk_type", "unknown") for metadata in metadatas
+            )
+            item_nums = {metadata.get("item_num", "") for metadata in metadatas}
 
-            return {
+            self._stats_cache = {
                 "total_documents": count,
                 "unique_items_in_sample": len(item_nums),
-                "chunk_types_in_sample": chunk_types,
+                "chunk_types_in_sample": dict(chunk_types),
                 "persist_directory": self.persist_directory,
                 "collection_name": self.collection_name,
                 "embedding_model": settings.GEMINI_EMBEDDING_MODEL,
             }
+            self._stats_cached_at = time.monotonic()
+            return self._stats_cache
 
         except Exception as e:
             logger.error(f"Error getting collection stats: {e}")
@@ -245,6 +385,7 @@ class VectorService:
 
     def reset_collection(self) -> bool:
         """Reset the collection (delete all documents)."""
+        self._stats_cache = None
         try:
             self.client.delete_collection(name=self.collection_name)
             self.collection = self.client.create_collection(
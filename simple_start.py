@@ -29,7 +29,7 @@ def main():
     
     try:
         # Import and start the app
-        from api.main import app
+        from api.main import uvicorn_options, uvicorn_workers
         import uvicorn
         
         logger.info("FastAPI app imported successfully")
@@ -37,11 +37,13 @@ def main():
         
         # Start the server
         uvicorn.run(
-            app, 
+            "api.main:app",
             host=host, 
             port=port, 
             log_level="info",
-            access_log=True
+            access_log=True,
+            workers=uvicorn_workers(),
+            **uvicorn_options()
         )
         
     except Exception as e:
@@ -12,6 +12,7 @@ from mbs_clarity.db import (
     insert_meta,
     insert_relations,
     reset_db,
+    transaction,
 )
 from mbs_clarity.mbs_parser import parse_csv, parse_xml, to_db_rows
 from mbs_clarity.relationship_extraction import extract_constraints, extract_relations
@@ -27,62 +28,57 @@ def _file_hash(path: str | None) -> str | None:
     if not path:
         return None
     try:
-        h = hashlib.sha256()
+        # file_digest reads into one reusable buffer rather than a new bytes
+        # object per 8 KiB chunk
         with open(path, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                h.update(chunk)
-        return h.hexdigest()
+            return hashlib.file_digest(f, "sha256").hexdigest()
     except Exception:
         return None
 
 
 def _summarize_counts(rows: list[tuple]) -> dict[str, int]:
     """Summarize counts by type from rows."""
-    counts: dict[str, int] = {}
-    for r in rows:
-        key = r[1] if len(r) > 1 else str(r)
-        counts[key] = counts.get(key, 0) + 1
-    return counts
+    return dict(Counter(r[1] if len(r) > 1 else str(r) for r in rows))
 
 
-def _analyze_extraction_patterns(items: list[dict]) -> dict[str, dict]:
-    """Analyze extraction patterns and coverage."""
+def _analyze_extraction_patterns(
+    descriptions: list[str],
+    relations_by_item: list[list[tuple]],
+    constraints_by_item: list[list[tuple]],
+) -> dict[str, dict]:
+    """Analyze extraction patterns and coverage.
+
+    Each argument has one entry per item, in the same order: the item's
+    description and the relation and constraint rows already extracted from it.
+    """
     logger.info("Analyzing extraction patterns...")
 
-    total_items = len(items)
+    total_items = len(descriptions)
     items_with_relations = 0
     items_with_constraints = 0
     items_with_both = 0
 
     relation_patterns = Counter()
     constraint_patterns = Counter()
-    description_lengths = []
-
-    for item in items:
-        item_num = str(item.get("item_num"))
-        description = item.get("description") or ""
-        derived_fee = item.get("derived_fee") or None
-
-        # Extract relations and constraints
-        relations = extract_relations(item_num, description, derived_fee)
-        constraints = extract_constraints(item_num, description)
 
+    # strict: a length mismatch would otherwise silently truncate the counts
+    for _, relations, constraints in zip(
+        descriptions, relations_by_item, constraints_by_item, strict=True
+    ):
         # Track patterns
         if relations:
             items_with_relations += 1
-            for rel in relations:
-                relation_patterns[rel[1]] += 1
+            relation_patterns.update(rel[1] for rel in relations)
 
         if constraints:
             items_with_constraints += 1
-            for con in constraints:
-                constraint_patterns[con[1]] += 1
+            constraint_patterns.update(con[1] for con in constraints)
 
         if relations and constraints:
             items_with_both += 1
 
-        # Track description lengths
-        description_lengths.append(len(description))
+    # Track description lengths
+    description_lengths = [len(description) for description in descriptions]
 
     # Calculate statistics
     avg_desc_length = (
@@ -155,41 +151,56 @@ def main():
     parse_time = (time.time() - t0) * 1000
     logger.info(f"Parsed {len(items)} items in {parse_time:.1f} ms")
 
-    # Insert items
-    logger.info("Inserting items into database")
-    t0 = time.time()
-    insert_items(to_db_rows(items))
-    insert_time = (time.time() - t0) * 1000
-    logger.info(f"Inserted {len(items)} items in {insert_time:.1f} ms")
-
-    # Extract relationships and constraints
-    logger.info("Extracting relationships and constraints")
-    t0 = time.time()
-    rel_rows: list[tuple] = []
-    con_rows: list[tuple] = []
-
-    for it in items:
-        item_num = str(it.get("item_num"))
-        description = it.get("description") or ""
-        derived_fee = it.get("derived_fee") or None
-        rel_rows.extend(extract_relations(item_num, description, derived_fee))
-        con_rows.extend(extract_constraints(item_num, description))
-
-    extraction_time = (time.time() - t0) * 1000
-    logger.info(
-        f"Extracted {len(rel_rows)} relations and {len(con_rows)} constraints in {extraction_time:.1f} ms"
-    )
-
-    # Insert relations and constraints
-    logger.info("Inserting relations and constraints into database")
-    t0 = time.time()
-    insert_relations(rel_rows)
-    insert_constraints(con_rows)
-    insert_relcon_time = (time.time() - t0) * 1000
-    logger.info(f"Inserted relations and constraints in {insert_relcon_time:.1f} ms")
+    # Items, relations and constraints are written as one transaction
+    with transaction():
+        # Insert items
+        logger.info("Inserting items into database")
+        t0 = time.time()
+        insert_items(to_db_rows(items))
+        insert_time = (time.time() - t0) * 1000
+        logger.info(f"Inserted {len(items)} items in {insert_time:.1f} ms")
+
+        # Extract relationships and constraints
+        logger.info("Extracting relationships and constraints")
+        t0 = time.time()
+        rel_rows: list[tuple] = []
+        con_rows: list[tuple] = []
+        # Per-item rows, kept for the pattern analysis below
+        relations_by_item: list[list[tuple]] = []
+        constraints_by_item: list[list[tuple]] = []
+
+        # Each item's fields are read once, into columns shared with the analysis
+        item_nums = [str(it.get("item_num")) for it in items]
+        descriptions = [it.get("description") or "" for it in items]
+        derived_fees = [it.get("derived_fee") or None for it in items]
+
+        for item_num, description, derived_fee in zip(
+            item_nums, descriptions, derived_fees, strict=True
+        ):
+            relations = extract_relations(item_num, description, derived_fee)
+            constraints = extract_constraints(item_num, description)
+            relations_by_item.append(relations)
+            constraints_by_item.append(constraints)
+            rel_rows.extend(relations)
+            con_rows.extend(constraints)
+
+        extraction_time = (time.time() - t0) * 1000
+        logger.info(
+            f"Extracted {len(rel_rows)} relations and {len(con_rows)} constraints in {extraction_time:.1f} ms"
+        )
+
+        # Insert relations and constraints
+        logger.info("Inserting relations and constraints into database")
+        t0 = time.time()
+        insert_relations(rel_rows)
+        insert_constraints(con_rows)
+        insert_relcon_time = (time.time() - t0) * 1000
+        logger.info(f"Inserted relations and constraints in {insert_relcon_time:.1f} ms")
 
     # Analyze extraction patterns
-    analysis = _analyze_extraction_patterns(items)
+    analysis = _analyze_extraction_patterns(
+        descriptions, relations_by_item, constraints_by_item
+    )
 
     # Log detailed metrics
     logger.info("=== EXTRACTION METRICS ===")
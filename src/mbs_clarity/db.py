@@ -1,27 +1,88 @@
 import os
 import sqlite3
+import threading
 from collections.abc import Iterable
 from contextlib import contextmanager
 
 DB_PATH = os.getenv("MBS_DB_PATH", "/Users/thomasshields/MBS_Clarity/mbs.db")
 
+# Stay under SQLite's default host-parameter limit for IN (...) queries
+MAX_SQL_VARIABLES = 900
+
+# Applied once per connection. WAL lets each thread's connection read while
+# another writes; mmap and a 64 MiB page cache keep hot pages in memory, and
+# temporary tables and sorts stay in memory too.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA temp_store=MEMORY",
+)
+
+# One long-lived connection per thread (the API's threadpool workers included)
+_local = threading.local()
+# Writers are serialized in-process; readers don't take it
+_write_lock = threading.RLock()
+
 
 def set_db_path(path: str) -> None:
     global DB_PATH
     DB_PATH = path
 
 
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
 @contextmanager
 def get_conn():
-    conn = sqlite3.connect(DB_PATH)
+    """Yield this thread's connection to DB_PATH, opening it on first use.
+
+    The connection stays open for reuse; it is replaced if DB_PATH changes.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.path != DB_PATH:
+        if conn is not None:
+            conn.close()
+        conn = _local.conn = _connect(DB_PATH)
+        _local.path = DB_PATH
     try:
         yield conn
-    finally:
-        conn.close()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def _commit(conn: sqlite3.Connection) -> None:
+    """Commit, unless the write is part of an enclosing :func:`transaction`."""
+    if not getattr(_local, "in_transaction", False):
+        conn.commit()
+
+
+@contextmanager
+def transaction():
+    """Group this thread's inserts into one transaction with a single commit.
+
+    Rolled back if the block raises.
+    """
+    with _write_lock, get_conn() as conn:
+        if getattr(_local, "in_transaction", False):
+            yield conn
+            return
+        _local.in_transaction = True
+        try:
+            yield conn
+        finally:
+            _local.in_transaction = False
+        conn.commit()
 
 
 def init_schema() -> None:
-    with get_conn() as conn:
+    with _write_lock, get_conn() as conn:
         cur = conn.cursor()
         cur.execute(
             """
@@ -75,11 +136,19 @@ def init_schema() -> None:
             );
             """
         )
+        # Item lookups select relations and constraints by item_num
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_relations_item_num ON relations(item_num);"
+        )
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_constraints_item_num "
+            "ON constraints(item_num);"
+        )
         conn.commit()
 
 
 def reset_db() -> None:
-    with get_conn() as conn:
+    with _write_lock, get_conn() as conn:
         cur = conn.cursor()
         cur.execute("DROP TABLE IF EXISTS constraints;")
         cur.execute("DROP TABLE IF EXISTS relations;")
@@ -90,7 +159,7 @@ def reset_db() -> None:
 
 
 def insert_items(rows: Iterable[tuple]):
-    with get_conn() as conn:
+    with _write_lock, get_conn() as conn:
         cur = conn.cursor()
         cur.executemany(
             """
@@ -99,35 +168,35 @@ def insert_items(rows: Iterable[tuple]):
                 start_date, end_date, provider_type, emsn_description
             ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
             """,
-            list(rows),
+            rows,
         )
-        conn.commit()
+        _commit(conn)
 
 
 def insert_relations(rows: Iterable[tuple]):
-    with get_conn() as conn:
+    with _write_lock, get_conn() as conn:
         cur = conn.cursor()
         cur.executemany(
             """
             INSERT INTO relations (item_num, relation_type, target_item_num, detail)
             VALUES (?, ?, ?, ?);
             """,
-            list(rows),
+            rows,
         )
-        conn.commit()
+        _commit(conn)
 
 
 def insert_constraints(rows: Iterable[tuple]):
-    with get_conn() as conn:
+    with _write_lock, get_conn() as conn:
         cur = conn.cursor()
         cur.executemany(
             """
             INSERT INTO constraints (item_num, constraint_type, value)
             VALUES (?, ?, ?);
             """,
-            list(rows),
+            rows,
         )
-        conn.commit()
+        _commit(conn)
 
 
 def insert_meta(
@@ -138,7 +207,7 @@ def insert_meta(
     constraints_count: int,
     loaded_at: str,
 ) -> None:
-    with get_conn() as conn:
+    with _write_lock, get_conn() as conn:
         cur = conn.cursor()
         cur.execute(
             """
@@ -154,7 +223,7 @@ def insert_meta(
                 constraints_count,
             ),
         )
-        conn.commit()
+        _commit(conn)
 
 
 def fetch_item_aggregate(item_num: str):
@@ -175,6 +244,48 @@ def fetch_item_aggregate(item_num: str):
         return item_row, rel_rows, con_rows
 
 
+def fetch_items_aggregate(item_nums: list[str]):
+    """Fetch several items with their relations and constraints in one pass.
+
+    Returns a dict mapping each found item_num to ``(item_row, rel_rows, con_rows)``,
+    shaped like :func:`fetch_item_aggregate`. Missing items are left out.
+    """
+    unique_nums = list(dict.fromkeys(item_nums))
+    aggregates: dict[str, tuple] = {}
+
+    with get_conn() as conn:
+        cur = conn.cursor()
+        for start in range(0, len(unique_nums), MAX_SQL_VARIABLES):
+            chunk = unique_nums[start : start + MAX_SQL_VARIABLES]
+            placeholders = ",".join(["?"] * len(chunk))
+
+            cur.execute(
+                f"SELECT * FROM items WHERE item_num IN ({placeholders})", chunk
+            )
+            for item_row in cur.fetchall():
+                aggregates[item_row[0]] = (item_row, [], [])
+
+            cur.execute(
+                "SELECT item_num, relation_type, target_item_num, detail FROM relations "
+                f"WHERE item_num IN ({placeholders}) ORDER BY id",
+                chunk,
+            )
+            for item_num, *rel in cur.fetchall():
+                if item_num in aggregates:
+                    aggregates[item_num][1].append(tuple(rel))
+
+            cur.execute(
+                "SELECT item_num, constraint_type, value FROM constraints "
+                f"WHERE item_num IN ({placeholders}) ORDER BY id",
+                chunk,
+            )
+            for item_num, *con in cur.fetchall():
+                if item_num in aggregates:
+                    aggregates[item_num][2].append(tuple(con))
+
+    return aggregates
+
+
 def fetch_items_like(item_nums: list[str]):
     placeholders = ",".join(["?"] * len(item_nums))
     with get_conn() as conn:
@@ -70,13 +70,20 @@ def main():
     logger.info("Starting FastAPI server...")
 
     # Import and run the app
-    from api.main import app
+    from api.main import uvicorn_options, uvicorn_workers
     import uvicorn
 
     port = int(os.getenv("PORT", 8000))
     host = os.getenv("API_HOST", "0.0.0.0")
 
-    uvicorn.run(app, host=host, port=port, log_level="info")
+    uvicorn.run(
+        "api.main:app",
+        host=host,
+        port=port,
+        log_level="info",
+        workers=uvicorn_workers(),
+        **uvicorn_options(),
+    )
 
 
 if __name__ == "__main__":
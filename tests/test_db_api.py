@@ -4,6 +4,8 @@ import tempfile
 import pytest
 from fastapi.testclient import TestClient
 from mbs_clarity.db import (
+    fetch_items_aggregate,
+    get_conn,
     init_schema,
     insert_constraints,
     insert_items,
@@ -11,6 +13,7 @@ from mbs_clarity.db import (
     insert_relations,
     reset_db,
     set_db_path,
+    transaction,
 )
 
 from api.main import app
@@ -247,6 +250,32 @@ def test_api_complex_item_with_all_relations(temp_db):
     assert "(b) performing a clinical examination" in requirements
 
 
+def test_fetch_items_aggregate_batches_codes(temp_db):
+    """Test batched item lookup groups relations and constraints per item."""
+    insert_items(
+        [
+            ("3", "1", "A1", 25.50, "Basic consultation", None, None, None, "gp", None),
+            ("23", "1", "A1", 39.75, "Extended", None, None, None, "gp", None),
+        ]
+    )
+    insert_relations(
+        [
+            ("3", "excludes", "23", "cannot be billed together"),
+            ("23", "same_day_excludes", "104", "not same day"),
+        ]
+    )
+    insert_constraints([("23", "duration_min_minutes", "20")])
+
+    aggregates = fetch_items_aggregate(["23", "999", "3", "23"])
+
+    assert set(aggregates) == {"3", "23"}
+    item_row, rel_rows, con_rows = aggregates["23"]
+    assert item_row[0] == "23"
+    assert rel_rows == [("same_day_excludes", "104", "not same day")]
+    assert con_rows == [("duration_min_minutes", "20")]
+    assert aggregates["3"][2] == []
+
+
 def test_api_meta_table_functionality(temp_db):
     """Test that meta table is properly populated."""
     insert_items(
@@ -268,3 +297,54 @@ def test_api_meta_table_functionality(temp_db):
     # Verify meta data was inserted (we can't easily test this through the API,
     # but we can verify the function works)
     assert True  # Meta insertion completed without error
+
+
+def test_index_page_etag_revalidation():
+    """Test that the UI page can be revalidated with its ETag."""
+    client = TestClient(app)
+    r = client.get("/")
+    assert r.status_code == 200
+    assert r.headers["cache-control"] == "public, max-age=300"
+
+    r = client.get("/", headers={"If-None-Match": r.headers["etag"]})
+    assert r.status_code == 304
+
+
+def test_connection_reused_per_thread(temp_db):
+    """Test that a thread keeps one WAL connection until the DB path changes."""
+    with get_conn() as first, get_conn() as second:
+        assert first is second
+        assert first.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    with tempfile.TemporaryDirectory() as td:
+        set_db_path(os.path.join(td, "other.db"))
+        with get_conn() as other:
+            assert other is not first
+        set_db_path(temp_db)
+
+
+def test_transaction_commits_inserts_once_or_rolls_back(temp_db):
+    """Test that inserts inside a transaction commit together or not at all."""
+    row = ("23", "1", "A1", 39.75, "Extended", None, None, None, "gp", None)
+
+    with pytest.raises(RuntimeError):
+        with transaction():
+            insert_items([row])
+            raise RuntimeError("load failed")
+    assert fetch_items_aggregate(["23"]) == {}
+
+    with transaction():
+        insert_items([row])
+        insert_constraints([("23", "duration_min_minutes", "20")])
+    assert fetch_items_aggregate(["23"])["23"][2] == [("duration_min_minutes", "20")]
+
+
+def test_item_lookups_use_item_num_indexes(temp_db):
+    """Test that relation and constraint lookups by item_num hit an index."""
+    with get_conn() as conn:
+        for table in ("relations", "constraints"):
+            plan = conn.execute(
+                f"EXPLAIN QUERY PLAN SELECT * FROM {table} WHERE item_num = ?",
+                ("23",),
+            ).fetchall()
+            assert f"idx_{table}_item_num" in " ".join(str(row[-1]) for row in plan)
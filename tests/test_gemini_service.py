@@ -0,0 +1,283 @@
+import asyncio
+from collections import Counter
+from types import SimpleNamespace
+
+import numpy as np
+
+from services.gemini_service import EmbeddingCache, GeminiService, ResponseCache
+
+
+def test_embedding_cache_persists_across_instances(tmp_path):
+    path = str(tmp_path / "emb.sqlite")
+    key = EmbeddingCache.key("models/embedding-001", "knee arthroscopy")
+
+    EmbeddingCache(path).put_many("models/embedding-001", {key: [0.5, -1.25, 2.0]})
+
+    found = EmbeddingCache(path).get_many([key, "missing"])
+    assert list(found) == [key]
+    assert found[key].dtype == np.float32
+    assert found[key].tolist() == [0.5, -1.25, 2.0]
+
+
+def test_embedding_cache_keeps_unpersisted_vectors_in_memory(tmp_path):
+    path = str(tmp_path / "emb.sqlite")
+    cache = EmbeddingCache(path)
+
+    cache.put_many("m", {"query": [1.0]}, persist=False)
+
+    assert list(cache.get_many(["query"])) == ["query"]
+    assert EmbeddingCache(path).get_many(["query"]) == {}
+
+
+def test_embedding_cache_falls_back_to_memory_when_disk_fails(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "emb.sqlite"))
+    cache._conn.execute("DROP TABLE emb")
+
+    cache.put_many("m", {"a": [1.0]})
+
+    assert cache._conn is None
+    assert cache.get_many(["a", "b"])["a"].tolist() == [1.0]
+
+
+def test_embedding_cache_key_includes_model():
+    assert EmbeddingCache.key("model-a", "text") != EmbeddingCache.key(
+        "model-b", "text"
+    )
+
+
+def test_embedding_cache_memory_lru_evicts_oldest():
+    cache = EmbeddingCache(max_entries=2)
+    cache.put_many("m", {"a": [1.0], "b": [2.0]})
+    cache.get_many(["a"])
+    cache.put_many("m", {"c": [3.0]})
+
+    found = cache.get_many(["a", "b", "c"])
+    assert {key: vector.tolist() for key, vector in found.items()} == {
+        "a": [1.0],
+        "c": [3.0],
+    }
+
+
+def test_get_embeddings_returns_unit_float32_rows_with_zero_fallbacks(monkeypatch):
+    monkeypatch.setattr(
+        "services.gemini_service.get_embedding_cache", lambda: EmbeddingCache()
+    )
+    service = GeminiService.__new__(GeminiService)
+    service.embedding_model = "models/embedding-001"
+    service._fetch_embeddings = lambda texts: [
+        [3.0, 4.0] + [0.0] * 766,
+        np.zeros(768),
+    ]
+
+    embeddings = service.get_embeddings(["gp consult", "unknown", "gp consult"])
+
+    assert embeddings.shape == (3, 768)
+    assert embeddings.dtype == np.float32
+    np.testing.assert_allclose(embeddings[0][:2], [0.6, 0.8])
+    np.testing.assert_array_equal(embeddings[0], embeddings[2])
+    assert not embeddings[1].any()
+
+
+def test_response_cache_semantic_hit_within_scope():
+    cache = ResponseCache(threshold=0.95)
+    scope = cache.scope("Analyze the query", 0.3)
+    response = {"success": True, "content": "{}", "model": "gemini"}
+    cache.put(scope, "gp consult", response, np.array([1.0, 0.0], dtype=np.float32))
+
+    near = np.array([0.99, 0.141], dtype=np.float32)
+    near /= np.linalg.norm(near)
+    far = np.array([0.0, 1.0], dtype=np.float32)
+
+    assert cache.get(scope, "gp consult") == response
+    assert cache.get_similar(scope, near) == response
+    assert cache.get_similar(scope, far) is None
+    assert cache.get_similar(cache.scope("Other prompt", 0.3), near) is None
+
+
+def test_generate_response_stream_yields_chunks_as_they_arrive():
+    async def chunks():
+        for text in ("Item ", "23", None):
+            yield SimpleNamespace(parts=[text] if text else [], text=text)
+
+    async def generate_content_async(prompt, stream=False, **kwargs):
+        assert stream
+        return chunks()
+
+    service = GeminiService.__new__(GeminiService)
+    service.model = SimpleNamespace(generate_content_async=generate_content_async)
+
+    async def collect():
+        return [text async for text in service.generate_response_stream("gp")]
+
+    assert asyncio.run(collect()) == ["Item ", "23"]
+
+
+def test_embed_content_retries_quota_errors_with_backoff(monkeypatch):
+    import services.gemini_service as gemini_service
+
+    calls = []
+    sleeps = []
+
+    def embed_content(**kwargs):
+        calls.append(kwargs)
+        if len(calls) < 3:
+            raise RuntimeError("429 Resource has been exhausted (e.g. check quota).")
+        return {"embedding": [[1.0]]}
+
+    monkeypatch.setattr(
+        gemini_service, "_genai", lambda: SimpleNamespace(embed_content=embed_content)
+    )
+    monkeypatch.setattr(gemini_service.time, "sleep", sleeps.append)
+
+    result = gemini_service._embed_content(model="m", content=["gp"])
+
+    assert result == {"embedding": [[1.0]]}
+    assert len(calls) == 3
+    assert len(sleeps) == 2 and sleeps[0] < sleeps[1]
+
+
+def make_reply(text, finish_reason="STOP"):
+    parts = [SimpleNamespace(text=text)] if text else []
+    candidate = SimpleNamespace(
+        content=SimpleNamespace(parts=parts),
+        finish_reason=SimpleNamespace(name=finish_reason),
+    )
+    return SimpleNamespace(candidates=[candidate])
+
+
+def test_structured_result_treats_blocked_response_as_failure():
+    service = GeminiService.__new__(GeminiService)
+    service.model_name = "gemini"
+
+    result = service._structured_result(make_reply(None, "SAFETY"), "scope", "gp", None)
+
+    assert result["success"] is False
+    assert result["content"] == ""
+
+
+def test_structured_result_caches_only_complete_parsed_replies(monkeypatch):
+    import services.gemini_service as gemini_service
+
+    cache = ResponseCache()
+    monkeypatch.setattr(gemini_service, "_response_cache", cache)
+    service = GeminiService.__new__(GeminiService)
+    service.model_name = "gemini"
+
+    truncated = service._structured_result(
+        make_reply('{"body_part": "kn', "MAX_TOKENS"), "scope", "a", None
+    )
+    invalid = service._structured_result(
+        make_reply("not json"), "scope", "b", None, json_mode=True
+    )
+    complete = service._structured_result(
+        make_reply('{"body_part": "knee"}'), "scope", "c", None, json_mode=True
+    )
+
+    assert truncated["success"] is False and invalid["success"] is False
+    assert cache.get("scope", "a") is None and cache.get("scope", "b") is None
+    assert complete["success"] is True
+    assert cache.get("scope", "c") == complete
+
+
+def test_warm_caches_seeds_analysis_cache(tmp_path, monkeypatch):
+    import services.gemini_service as gemini_service
+
+    monkeypatch.setattr(gemini_service, "_response_cache", ResponseCache())
+    path = tmp_path / "frequent.jsonl"
+    path.write_text(
+        '{"query": "gp home visit", "analysis": {"location": "home"}}\n'
+        '{"query": "ecg"}\n'
+    )
+    service = GeminiService.__new__(GeminiService)
+    service.model_name = "gemini"
+    service.get_embeddings = lambda texts: np.eye(len(texts), dtype=np.float32)
+
+    assert service.warm_caches(str(path)) == 2
+
+    analysis = service._parse_analysis(
+        service._cached_response(
+            service._response_scope(service.ANALYSIS_SYSTEM_PROMPT), "gp home visit"
+        ),
+    )
+    assert analysis["location"] == "home"
+    assert analysis["body_part"] is None
+
+
+def test_basic_query_analysis_takes_first_keyword_per_field():
+    service = GeminiService.__new__(GeminiService)
+
+    analysis = service._basic_query_analysis(
+        "GP consultation at home for chest pain, then hospital scan"
+    )
+
+    assert analysis == {
+        "body_part": "chest",
+        "procedure_type": "consultation",
+        "provider_type": "general practitioner",
+        "location": "home",
+        "specific_details": None,
+        "patient_characteristics": None,
+    }
+
+
+def test_analyze_medical_query_skips_gemini_when_keywords_cover_query():
+    service = GeminiService.__new__(GeminiService)
+    service.analysis_counts = Counter()
+    service.generate_structured_response = None  # must not be called
+
+    analysis = service.analyze_medical_query("GP consultation at home for chest pain")
+
+    assert analysis["provider_type"] == "general practitioner"
+    assert service.analysis_counts == {"keywords": 1}
+
+
+def test_analyze_medical_query_result_marks_keyword_fallback():
+    service = GeminiService.__new__(GeminiService)
+    service.analysis_counts = Counter()
+    service.generate_structured_response = lambda *args, **kwargs: {
+        "success": False,
+        "error": "quota",
+    }
+
+    result = service.analyze_medical_query_result("chest pain")
+
+    assert result.source == "fallback"
+    assert result.analysis["body_part"] == "chest"
+
+
+def test_semantic_cache_embeds_up_front_only_once_prompts_are_indexed(monkeypatch):
+    import services.gemini_service as gemini_service
+
+    monkeypatch.setattr(gemini_service, "_response_cache", ResponseCache())
+    monkeypatch.setattr(
+        gemini_service,
+        "_INDEX_POOL",
+        SimpleNamespace(submit=lambda fn, *args: fn(*args)),
+    )
+    events = []
+
+    def get_embeddings(texts):
+        events.append(("embed", texts[0]))
+        return np.array([[1.0, 0.0]], dtype=np.float32)
+
+    def generate_content(prompt, **kwargs):
+        events.append(("generate", prompt))
+        return make_reply("answer")
+
+    service = GeminiService.__new__(GeminiService)
+    service.model_name = "gemini"
+    service.model = SimpleNamespace(generate_content=generate_content)
+    service.get_embeddings = get_embeddings
+    monkeypatch.setattr(gemini_service, "_structured_config", lambda *args: None)
+    monkeypatch.setattr(gemini_service, "_safety_settings", lambda: None)
+
+    first = service.generate_structured_response("gp consult", semantic_cache=True)
+    second = service.generate_structured_response("gp consultation", semantic_cache=True)
+
+    assert events == [
+        ("generate", "gp consult"),
+        ("embed", "gp consult"),
+        ("embed", "gp consultation"),
+    ]
+    assert first["success"] is True
+    assert second == first
@@ -0,0 +1,30 @@
+from mbs_clarity._loader import _analyze_extraction_patterns, _summarize_counts
+
+
+def test_analyze_extraction_patterns_uses_extracted_rows():
+    descriptions = ["abcd", "ab", ""]
+    relations = [[("23", "excludes", "36", None)], [], []]
+    constraints = [
+        [("23", "duration_min", "20"), ("23", "duration_max", "40")],
+        [("36", "duration_min", "40")],
+        [],
+    ]
+
+    analysis = _analyze_extraction_patterns(descriptions, relations, constraints)
+
+    assert analysis["items_with_relations"] == 1
+    assert analysis["items_with_constraints"] == 2
+    assert analysis["items_with_both"] == 1
+    assert analysis["relation_patterns"] == {"excludes": 1}
+    assert analysis["constraint_patterns"] == {"duration_min": 2, "duration_max": 1}
+    assert analysis["description_stats"] == {
+        "avg_length": 2.0,
+        "max_length": 4,
+        "min_length": 0,
+    }
+
+
+def test_summarize_counts_by_type():
+    rows = [("23", "excludes", "36"), ("36", "excludes", "23"), ("44", "duration")]
+
+    assert _summarize_counts(rows) == {"excludes": 2, "duration": 1}
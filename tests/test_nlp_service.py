@@ -0,0 +1,187 @@
+import threading
+from collections import OrderedDict
+from types import SimpleNamespace
+
+from services.gemini_service import AnalysisResult
+from services.nlp_service import NLPService, recent_messages
+from services.vector_service import SearchResults
+
+
+def make_service(**gemini_methods):
+    service = NLPService.__new__(NLPService)
+    service.gemini_service = SimpleNamespace(**gemini_methods)
+    service._analysis_cache = OrderedDict()
+    service._analysis_lock = threading.Lock()
+    return service
+
+
+def test_analyze_query_reuses_recent_analysis_as_a_copy():
+    calls = []
+
+    def analyze_medical_query_result(query):
+        calls.append(query)
+        return AnalysisResult({"procedure_type": "consultation"}, "gemini")
+
+    service = make_service(analyze_medical_query_result=analyze_medical_query_result)
+
+    first = service._analyze_query("gp consult")
+    first["conversation_context"] = {}
+    second = service._analyze_query("gp consult")
+
+    assert calls == ["gp consult"]
+    assert second == {"procedure_type": "consultation"}
+
+
+def test_analyze_query_does_not_cache_keyword_fallback():
+    calls = []
+
+    def analyze_medical_query_result(query):
+        calls.append(query)
+        return AnalysisResult({"procedure_type": None}, "fallback")
+
+    service = make_service(analyze_medical_query_result=analyze_medical_query_result)
+
+    service._analyze_query("gp consult")
+    service._analyze_query("gp consult")
+
+    assert calls == ["gp consult", "gp consult"]
+
+
+def test_detailed_suggestions_score_each_code_from_its_search_result(monkeypatch):
+    rows = {
+        "23": (("23", None, None, None, "Professional attendance by a GP"), [], []),
+        "36": (("36", None, None, None, "Long professional attendance"), [], []),
+    }
+    monkeypatch.setattr(
+        "services.nlp_service.fetch_items_aggregate",
+        lambda item_nums: {num: rows[num] for num in item_nums if num in rows},
+    )
+    search_results = SearchResults(
+        ids=["a", "b", "c"],
+        item_nums=["36", "23", "36"],
+        scores=[0.2, 0.5, 0.9],
+    )
+
+    suggestions = make_service()._get_detailed_suggestions(
+        ["23", "36", "999"], "knee", search_results
+    )
+
+    assert [s["code"] for s in suggestions] == ["23", "36"]
+    assert [s["confidence"] for s in suggestions] == [50.0, 20.0]
+
+
+def test_detailed_suggestions_skip_codes_the_search_did_not_retrieve(monkeypatch):
+    fetched = []
+    monkeypatch.setattr(
+        "services.nlp_service.fetch_items_aggregate",
+        lambda item_nums: fetched.append(item_nums) or {},
+    )
+    service = make_service()
+
+    assert service._get_detailed_suggestions(["23"], "knee", SearchResults()) == []
+    assert (
+        service._get_detailed_suggestions(
+            ["23"], "knee", SearchResults(ids=["a"], item_nums=["36"], scores=[0.5])
+        )
+        == []
+    )
+    assert fetched == []
+
+
+def test_validate_mbs_query():
+    service = make_service()
+
+    assert service._validate_mbs_query("knee scope")["valid"]
+    assert service._validate_mbs_query("GP consult about travel vaccines")["valid"]
+    assert not service._validate_mbs_query("weather tomorrow")["valid"]
+    assert not service._validate_mbs_query("what is the best pizza near me")["valid"]
+
+
+def test_conversation_context_reads_recent_messages():
+    history = [{"type": "user", "content": "old"}] * 3 + [
+        {"type": "user", "content": "gp consult"},
+        {"type": "assistant", "suggested_codes": ["23", "36"]},
+        {"type": "assistant", "suggested_codes": None},
+    ]
+
+    context = make_service()._build_conversation_context(
+        recent_messages(history), "longer one"
+    )
+
+    assert context["previous_queries"] == ["old", "old", "gp consult"]
+    assert context["previous_suggestions"] == ["23", "36"]
+    assert context["current_focus"] == "refining_suggestions"
+
+
+def test_reasoning_skips_stopwords_shared_with_description():
+    service = make_service()
+
+    reasoning = service._generate_meaningful_reasoning(
+        "this wound with suturing",
+        "Repair of wound with suturing of the skin",
+        "30026",
+    )
+
+    assert "with" not in reasoning
+    assert "'wound'" in reasoning and "'suturing'" in reasoning
+
+
+def test_reasoning_falls_back_to_shared_then_description_topics():
+    service = make_service()
+
+    assert (
+        service._generate_meaningful_reasoning(
+            "videoconsultation", "Long videoconsultation, procedure", "36"
+        )
+        == "Matched based on consultation-related content"
+    )
+    assert (
+        service._generate_meaningful_reasoning("xx", "Minor procedure", "30001")
+        == "Matched based on medical procedure content"
+    )
+    assert (
+        service._generate_meaningful_reasoning("xx", "Other", "30001")
+        == "Matched based on medical service content"
+    )
+
+
+def test_reasoning_quotes_terms_in_query_order():
+    service = make_service()
+
+    reasoning = service._generate_meaningful_reasoning(
+        "suturing wound repair",
+        "Repair of wound with suturing",
+        "30026",
+    )
+
+    assert reasoning == "Matched based on: 'suturing', 'wound', and 'repair'"
+
+
+def test_vector_search_without_provider_type_runs_one_search(monkeypatch):
+    searches = []
+    service = make_service()
+    service.vector_service = SimpleNamespace(
+        search=lambda **kwargs: searches.append(kwargs["query"]) or SearchResults()
+    )
+    monkeypatch.setattr("services.nlp_service._SEARCH_POOL", None)
+
+    service._perform_vector_search("knee", {"provider_type": None})
+
+    assert searches == ["knee"]
+
+
+def test_medical_terms_match_plural_forms():
+    service = make_service()
+
+    reasoning = service._generate_meaningful_reasoning(
+        "multiple injections for surgeons",
+        "Injection of a joint by a surgeon",
+        "50124",
+    )
+    plain = service._calculate_confidence_score("xx", "Injection by a surgeon", 0.5)
+    plural = service._calculate_confidence_score(
+        "injections by surgeons", "Injection by a surgeon", 0.5
+    )
+
+    assert "'injection'" in reasoning
+    assert plural > plain
@@ -0,0 +1,118 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from services import vector_service
+from services.gemini_service import EmbeddingCache
+from services.vector_service import SearchResults, VectorService, _load_local_model
+
+
+def results(ids):
+    return SearchResults(
+        ids=list(ids),
+        item_nums=[f"item-{i}" for i in ids],
+        contents=[f"content-{i}" for i in ids],
+        metadatas=[{"id": i} for i in ids],
+        scores=[0.5] * len(ids),
+        distances=[0.5] * len(ids),
+    )
+
+
+def test_extend_unique_skips_existing_and_repeated_ids():
+    merged = results(["a", "b"])
+
+    merged.extend_unique(results(["b", "c", "c", "d"]))
+
+    assert merged.ids == ["a", "b", "c", "d"]
+    assert merged.item_nums == ["item-a", "item-b", "item-c", "item-d"]
+    assert len(merged.distances) == 4
+
+
+def test_encode_local_encodes_each_uncached_text_once(monkeypatch):
+    batches = []
+
+    class Model:
+        def encode(self, texts, **kwargs):
+            batches.append(list(texts))
+            return np.array([[len(text), 1.0] for text in texts])
+
+    cache = EmbeddingCache()
+    monkeypatch.setattr("services.vector_service.get_embedding_cache", lambda: cache)
+    service = VectorService.__new__(VectorService)
+    service.local_embedding_model = Model()
+
+    first = service._encode_local(["knee", "hip", "knee"])
+    second = service._encode_local(["hip", "elbow"])
+
+    assert batches == [["knee", "hip"], ["elbow"]]
+    assert first.dtype == np.float32
+    assert first.tolist() == [[4.0, 1.0], [3.0, 1.0], [4.0, 1.0]]
+    assert second.tolist() == [[3.0, 1.0], [5.0, 1.0]]
+
+
+def test_search_without_documents_requests_only_metadata(monkeypatch):
+    calls = []
+
+    class Collection:
+        def query(self, **kwargs):
+            calls.append(kwargs["include"])
+            return {
+                "ids": [["x"]],
+                "metadatas": [[{"id": "a", "item_num": "23"}]],
+                "distances": [[0.25]],
+            }
+
+    monkeypatch.setattr(
+        vector_service,
+        "settings",
+        vector_service.settings.model_copy(update={"USE_LOCAL_EMBEDDINGS": False}),
+    )
+    service = VectorService.__new__(VectorService)
+    service.local_embedding_model = None
+    service.gemini_service = SimpleNamespace(
+        get_embeddings=lambda texts: np.ones((len(texts), 2), dtype=np.float32)
+    )
+    service.collection = Collection()
+
+    found = service.search("knee", as_soa=True, include_documents=False)
+
+    assert calls == [["metadatas", "distances"]]
+    assert found.item_nums == ["23"]
+    assert found.contents == [""]
+    assert found.scores == [0.75]
+
+
+def test_concurrent_first_use_loads_the_local_model_once(monkeypatch):
+    loads = []
+
+    def load(name):
+        loads.append(name)
+        time.sleep(0.05)
+        return SimpleNamespace(name=name)
+
+    monkeypatch.setattr(
+        "services.vector_service.SentenceTransformer", load, raising=False
+    )
+    monkeypatch.setattr("services.vector_service.SENTENCE_TRANSFORMERS_AVAILABLE", True)
+    monkeypatch.setattr(
+        vector_service,
+        "settings",
+        vector_service.settings.model_copy(update={"USE_LOCAL_EMBEDDINGS": True}),
+    )
+    _load_local_model.cache_clear()
+    services = [VectorService.__new__(VectorService) for _ in range(4)]
+    for service in services:
+        service.local_embedding_model = None
+        service._model_loaded = False
+
+    threads = [threading.Thread(target=s._ensure_model_loaded) for s in services]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    _load_local_model.cache_clear()
+
+    assert len(loads) == 1
+    assert len({id(s.local_embedding_model) for s in services}) == 1